@@ -624,7 +624,7 @@ async def lookup_printer_issue(
     try:
         # Search the knowledge base
         matches = agent_state.printer_kb.search_by_caller_description(
-            customer_description
+            customer_description, top_k=MAX_ISSUE_MATCHES
         )
         
         if not matches:
@@ -641,22 +641,12 @@ async def lookup_printer_issue(
                 ],
             }, indent=2)
         
-        # Format results (limit to top matches for performance)
+        # Format results (limit to top matches for performance); each issue's
+        # result dict is cached by the knowledge base
         results = []
-        for issue in matches[:MAX_ISSUE_MATCHES]:
+        for issue in matches:
             try:
-                resolution_steps = agent_state.printer_kb.get_resolution_steps(issue)
-                result = {
-                    "system_alert_type": issue.system_alert_type,
-                    "caller_issue_type": issue.caller_issue_type,
-                    "resolution": issue.resolution,
-                    "impacted_equipment": issue.impacted_equipment,
-                    "call_recording_needed": issue.call_recording_needed,
-                    "resolution_steps": resolution_steps,
-                }
-                if issue.special_notes:
-                    result["special_notes"] = issue.special_notes
-                results.append(result)
+                results.append(agent_state.printer_kb.as_dict(issue))
             except Exception as e:
                 logger.warning(f"Error processing issue {issue.caller_issue_type}: {e}")
                 continue
@@ -9,6 +9,50 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# User signal words per cooperation category (immutable, shared by all instances)
+_SIGNALS = {
+    "positive": ("okay", "sure", "yes", "got it", "done", "ready", "yes", "yep", "alright", "perfect"),
+    "hesitant": ("busy", "later", "not now", "in a rush", "can't", "maybe", "not sure"),
+    "confused": ("what", "how", "don't understand", "where", "huh", "repeat"),
+    "frustrated": ("already did", "not working", "still broken", "ugh", "frustrated", "annoyed")
+}
+_SIGNAL_SCORES = {"positive": 5, "hesitant": -10, "confused": -5, "frustrated": -15}
+# Flattened (category, word, delta) tuple so each response is scanned once
+_SIGNAL_DELTAS = tuple(
+    (category, word, _SIGNAL_SCORES[category])
+    for category, words in _SIGNALS.items()
+    for word in words
+)
+
+# Natural phrases by context and conversation pace
+_PHRASES = {
+    "acknowledging": {
+        "efficient": ("Okay", "Got it", "Perfect"),
+        "balanced": ("Okay, I understand", "Got it, thanks", "Perfect, thank you"),
+        "patient": ("Okay, I totally understand", "I hear you, and I appreciate your patience", "Thank you so much for working with me on this")
+    },
+    "thinking": {
+        "efficient": ("Let me check", "One moment"),
+        "balanced": ("Let me check on that for you", "Give me just a second"),
+        "patient": ("Let me take a look at that for you", "Give me just a moment while I check")
+    },
+    "encouraging": {
+        "efficient": ("Good", "Nice"),
+        "balanced": ("Good job", "You're doing great"),
+        "patient": ("You're doing great", "Perfect, you're doing exactly what we need", "I really appreciate your patience with this")
+    },
+    "empathy": {
+        "efficient": (),
+        "balanced": ("I understand this can be frustrating",),
+        "patient": ("I know this is frustrating, and I really appreciate your patience", "I understand how inconvenient this is, especially when you're busy")
+    }
+}
+
+
+def _clamp_score(score: int) -> int:
+    """Clamp a score to the 0-100 range (inline compares, no min/max calls)"""
+    return 0 if score < 0 else 100 if score > 100 else score
+
 
 class AdaptivePersonality:
     """
@@ -23,7 +67,7 @@ class AdaptivePersonality:
     
     def update(self, new_score: int):
         """Update cooperation score"""
-        self.cooperation_score = max(0, min(100, new_score))
+        self.cooperation_score = _clamp_score(new_score)
     
     def assess_cooperation(self, user_responses: List[str]) -> int:
         """
@@ -32,45 +76,21 @@ class AdaptivePersonality:
         if not user_responses:
             return self.cooperation_score
         
-        signals = {
-            "positive": ["okay", "sure", "yes", "got it", "done", "ready", "yes", "yep", "alright", "perfect"],
-            "hesitant": ["busy", "later", "not now", "in a rush", "can't", "maybe", "not sure"],
-            "confused": ["what", "how", "don't understand", "where", "huh", "repeat"],
-            "frustrated": ["already did", "not working", "still broken", "ugh", "frustrated", "annoyed"]
-        }
-        
         score_adjustment = 0
         
         for response in user_responses[-5:]:  # Look at last 5 responses
             response_lower = response.lower()
             
-            # Check for positive signals
-            for positive_word in signals["positive"]:
-                if positive_word in response_lower:
-                    score_adjustment += 5
-                    break
-            
-            # Check for hesitant signals
-            for hesitant_word in signals["hesitant"]:
-                if hesitant_word in response_lower:
-                    score_adjustment -= 10
-                    break
-            
-            # Check for confused signals
-            for confused_word in signals["confused"]:
-                if confused_word in response_lower:
-                    score_adjustment -= 5
-                    break
-            
-            # Check for frustrated signals
-            for frustrated_word in signals["frustrated"]:
-                if frustrated_word in response_lower:
-                    score_adjustment -= 15
-                    break
+            # Single scan over all signal words; each category counts at most
+            # once per response, so "okay but still broken" scores both +5 and -15
+            matched = set()
+            for category, word, delta in _SIGNAL_DELTAS:
+                if category not in matched and word in response_lower:
+                    score_adjustment += delta
+                    matched.add(category)
         
         # Update cooperation score
-        new_score = self.cooperation_score + score_adjustment
-        self.cooperation_score = max(0, min(100, new_score))
+        self.cooperation_score = _clamp_score(self.cooperation_score + score_adjustment)
         
         return self.cooperation_score
     
@@ -128,34 +148,10 @@ class AdaptivePersonality:
         Get natural phrases based on context and cooperation level
         """
         style = self.get_style_adjustments()
-        
-        phrases = {
-            "acknowledging": {
-                "efficient": ["Okay", "Got it", "Perfect"],
-                "balanced": ["Okay, I understand", "Got it, thanks", "Perfect, thank you"],
-                "patient": ["Okay, I totally understand", "I hear you, and I appreciate your patience", "Thank you so much for working with me on this"]
-            },
-            "thinking": {
-                "efficient": ["Let me check", "One moment"],
-                "balanced": ["Let me check on that for you", "Give me just a second"],
-                "patient": ["Let me take a look at that for you", "Give me just a moment while I check"]
-            },
-            "encouraging": {
-                "efficient": ["Good", "Nice"],
-                "balanced": ["Good job", "You're doing great"],
-                "patient": ["You're doing great", "Perfect, you're doing exactly what we need", "I really appreciate your patience with this"]
-            },
-            "empathy": {
-                "efficient": [],
-                "balanced": ["I understand this can be frustrating"],
-                "patient": ["I know this is frustrating, and I really appreciate your patience", "I understand how inconvenient this is, especially when you're busy"]
-            }
-        }
-        
         pace_key = style["pace"]
         
-        if context in phrases:
-            return phrases[context].get(pace_key, phrases[context]["balanced"])
+        if context in _PHRASES:
+            return list(_PHRASES[context].get(pace_key, _PHRASES[context]["balanced"]))
         
         return []
     
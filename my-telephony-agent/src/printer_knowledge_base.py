@@ -3,306 +3,650 @@ Printer Knowledge Base - Contains printer issue types, resolutions, and detailed
 Based on Catalina documentation for printer troubleshooting
 """
 
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import re
+import heapq
+import sys
+from collections import Counter, defaultdict
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from typing import Any, List, Dict, FrozenSet, Mapping, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field
 
+__all__ = ["PrinterIssue", "PrinterKnowledgeBase", "preload"]
 
-@dataclass
+# Optional: Aho-Corasick automaton for single-pass phrase matching
+# (pip install pyahocorasick); a compiled regex alternation is used otherwise
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+# Canonical step / note tuples: issues with identical content share one tuple
+_TEXT_POOL: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Read-only tool result fields, filled on first request per issue (see as_dict)
+_ISSUE_DICTS: Dict["PrinterIssue", Mapping[str, Any]] = {}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class PrinterIssue:
     """Represents a printer issue with its resolution and related information"""
     system_alert_type: str  # Outbound system alert issue type
     caller_issue_type: str  # Inbound caller issue type
     resolution: str
     impacted_equipment: str
-    call_recording_needed: bool
-    call_recording_id: Optional[str] = None
-    detailed_steps: Optional[List[str]] = None
-    special_notes: Optional[List[str]] = None
+    call_recording_id: int = 0  # Number of the "CALL N" recording; 0 when none is needed
+    detailed_steps: Tuple[str, ...] = ()  # Empty when only the basic fallback applies
+    special_notes: Tuple[str, ...] = ()
+    # Precomputed hash of the identifying fields (see __eq__ / __hash__)
+    _fingerprint: int = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Categorical fields repeat across issues; intern them so duplicates
+        # share one object and compare by identity
+        for name in ("system_alert_type", "caller_issue_type", "resolution",
+                     "impacted_equipment"):
+            object.__setattr__(self, name, sys.intern(getattr(self, name)))
+        for name in ("detailed_steps", "special_notes"):
+            value = tuple(sys.intern(text) for text in getattr(self, name))
+            object.__setattr__(self, name, _TEXT_POOL.setdefault(value, value))
+        object.__setattr__(self, "_fingerprint", hash(
+            (self.resolution, self.system_alert_type, self.caller_issue_type)
+        ))
+    
+    def __reduce__(self):
+        # Rebuild through __init__ rather than restoring _fingerprint: str
+        # hashes are seeded per process, so it must be recomputed on load
+        return (PrinterIssue, (
+            self.system_alert_type, self.caller_issue_type, self.resolution,
+            self.impacted_equipment, self.call_recording_id, self.detailed_steps,
+            self.special_notes,
+        ))
+    
+    def __hash__(self) -> int:
+        return self._fingerprint
+    
+    def __eq__(self, other) -> bool:
+        # Resolution is the KB's primary key, so comparing the fingerprint and
+        # resolution avoids walking the step and note tuples
+        if not isinstance(other, PrinterIssue):
+            return NotImplemented
+        return self._fingerprint == other._fingerprint and self.resolution == other.resolution
 
 
-class PrinterKnowledgeBase:
-    """Knowledge base for printer issues and resolutions with detailed troubleshooting steps"""
-    
-    def __init__(self):
-        self.issues: List[PrinterIssue] = [
-            PrinterIssue(
-                system_alert_type="Mech Error / Paper Out",
-                caller_issue_type="Printer Making Sounds / Paper not coming out",
-                resolution="Loaded Paper",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 1",
-                detailed_steps=[
-                    "Call the store and let them know the printer on their lane is showing out of paper",
-                    "Ask if they can put in a new roll of paper",
-                    "If they need help, guide them: put the paper in with the letter side facing down, feed it through the top of the paper door, then close the door",
-                    "If the store is out of paper, note that in the ticket and follow up on paper delivery",
-                    "Once paper is loaded, check that the printer shows ready status",
-                    "Send a test print to verify everything is working",
-                    "If the print quality looks good, you're all set! If not, you may need to run an ink cleaning"
-                ],
-                special_notes=[
-                    "FOR PRINTER OUTBOUND CALLS (SYSTEM ALERTS OR NON-POOR PRINT MAIL LISTEN TICKETS), AGENTS ARE NO LONGER REQUIRED TO SEND OR OFFER TO SEND TEST COUP(S) AFTER FIXING THE ISSUE. A TEST COUP WILL ONLY BE SENT AS PER POC'S Request"
-                ]
+# Text shared by several issues, defined once and spliced in below
+_NO_TEST_COUP_NOTE = (
+    "FOR PRINTER OUTBOUND CALLS (SYSTEM ALERTS OR NON-POOR PRINT MAIL LISTEN TICKETS), "
+    "AGENTS ARE NO LONGER REQUIRED TO SEND OR OFFER TO SEND TEST COUP(S) AFTER FIXING THE ISSUE"
+)
+_TEST_PRINT_STEPS = (
+    "Send a test print to verify everything is working",
+    "If the print quality looks good, you're all set! If not, you may need to run an ink cleaning",
+)
+
+
+# Basic steps per resolution, for issues without detailed_steps
+_FALLBACK_RESOLUTION_STEPS: Dict[str, Tuple[str, ...]] = {
+    "Loaded Paper": (
+        "Open the paper tray and check if paper is loaded correctly",
+        "Make sure the paper is aligned properly",
+        "Close the tray and send a test print to verify it's working"
+    ),
+    "Cleared Paper Jam": (
+        "Turn off the printer and open all access panels",
+        "Gently remove any jammed paper and check for torn pieces",
+        "Close all panels, turn the printer back on, and test print"
+    ),
+    "Loaded Ink": (
+        "Open the ink cartridge door and remove the old cartridge",
+        "Install the new cartridge making sure it's seated properly",
+        "Close the door and let the printer run its cleaning cycle",
+        "Send a test print to verify everything is working"
+    ),
+    "Ink Cleaning": (
+        "Access the printer maintenance menu",
+        "Select the ink cleaning option and follow the prompts",
+        "Wait for the cleaning cycle to finish, then test print"
+    ),
+    "PC Reboot": (
+        "Restart the PC and wait for it to fully boot up",
+        "Check that the printer connection is working",
+        "Send a test print to verify everything is resolved"
+    ),
+    "Plugged-in Printer Power Cord": (
+        "Check that the power cord is connected to both the printer and the outlet",
+        "Make sure the outlet has power and the printer switch is on",
+        "Test that the printer powers on correctly"
+    ),
+    "Printer SW - Not Commable (Restart Services)": (
+        "Access the printer service settings",
+        "Restart the printer service and wait a moment",
+        "Check that the service is running and the printer is connected",
+        "Send a test print to verify everything is working"
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _build_issues() -> Tuple[PrinterIssue, ...]:
+    """
+    Build every known printer issue. Runs once, on first use, and the result
+    is shared (read-only) by all PrinterKnowledgeBase instances.
+    """
+    return (
+        PrinterIssue(
+            system_alert_type="Mech Error / Paper Out",
+            caller_issue_type="Printer Making Sounds / Paper not coming out",
+            resolution="Loaded Paper",
+            impacted_equipment="CMC6",
+            call_recording_id=1,
+            detailed_steps=(
+                "Call the store and let them know the printer on their lane is showing out of paper",
+                "Ask if they can put in a new roll of paper",
+                "If they need help, guide them: put the paper in with the letter side facing down, feed it through the top of the paper door, then close the door",
+                "If the store is out of paper, note that in the ticket and follow up on paper delivery",
+                "Once paper is loaded, check that the printer shows ready status",
+                *_TEST_PRINT_STEPS
             ),
-            PrinterIssue(
-                system_alert_type="Mech Error",
-                caller_issue_type="Printer Making Sounds / Paper not coming out",
-                resolution="Cleared Paper Jam",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 2",
-                detailed_steps=[
-                    "Call the store and help them clear the paper jam",
-                    "Have them open the paper door and remove the paper roll",
-                    "Ask them to tilt the printer so you can see inside - check for any stuck paper in the front upper corners",
-                    "For CMC6 printers: look for a small silver square metal plate (the print head) on the inside top part",
-                    "Have them gently move the print head to the right and remove any debris that's stuck",
-                    "Important: Don't use compressed air on the printer",
-                    "Put the paper roll back in, close the door, and press the reset button on the bottom left",
-                    "Wait about 30 seconds for the printer to reset",
-                    "Check that the printer shows ready, then send a test print",
-                    "If the print quality looks good, you're done! If not, you may need to run an ink cleaning"
-                ],
-                special_notes=[
-                    "FOR PRINTER OUTBOUND CALLS (SYSTEM ALERTS OR NON-POOR PRINT MAIL LISTEN TICKETS), AGENTS ARE NO LONGER REQUIRED TO SEND OR OFFER TO SEND TEST COUP(S) AFTER FIXING THE ISSUE",
-                    "FOLLOW STANDARD POC UNWILLING PROCESS: L1C POC Unwilling to Assist",
-                    "IF POC IS INSISTENT IN SENDING A TECH RIGHT AWAY: Agents need to escalate to a SME if a non-flagship store is demanding dispatch"
-                ]
+            special_notes=(
+                _NO_TEST_COUP_NOTE + ". A TEST COUP WILL ONLY BE SENT AS PER POC'S Request",
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="Mech Error",
+            caller_issue_type="Printer Making Sounds / Paper not coming out",
+            resolution="Cleared Paper Jam",
+            impacted_equipment="CMC6",
+            call_recording_id=2,
+            detailed_steps=(
+                "Call the store and help them clear the paper jam",
+                "Have them open the paper door and remove the paper roll",
+                "Ask them to tilt the printer so you can see inside - check for any stuck paper in the front upper corners",
+                "For CMC6 printers: look for a small silver square metal plate (the print head) on the inside top part",
+                "Have them gently move the print head to the right and remove any debris that's stuck",
+                "Important: Don't use compressed air on the printer",
+                "Put the paper roll back in, close the door, and press the reset button on the bottom left",
+                "Wait about 30 seconds for the printer to reset",
+                "Check that the printer shows ready, then send a test print",
+                "If the print quality looks good, you're done! If not, you may need to run an ink cleaning"
             ),
-            PrinterIssue(
-                system_alert_type="Ink Out / NR Error",
-                caller_issue_type="Printer Making Sounds / Error light on printer / poor print quality / Blank Prints",
-                resolution="Loaded Ink",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 3",
-                detailed_steps=[
-                    "Call the store and ask if they have a new, unopened ink cartridge available",
-                    "If yes, have them remove the old cartridge and open a fresh one from the sealed package while you're on the phone",
-                    "For CMC9 cartridges, they're in a brown box with bright yellow Catalina labels",
-                    "Install the new cartridge and close the ink door",
-                    "The printer will automatically run a cleaning cycle (about 60 seconds) - the status light will flash",
-                    "If the new cartridge doesn't work, try one from a working printer to test if it's a bad cartridge",
-                    "If the store is out of ink, note that in the ticket and check on ink delivery status",
-                    "Once the ink is replaced, check that the printer shows ready",
-                    "Send a test print to verify everything is working",
-                    "If the print quality looks good, you're all set! If not, you may need to run an ink cleaning"
-                ],
-                special_notes=[
-                    "Reasons why some cartridges will not work:",
-                    "- The cartridge is defective",
-                    "- POC tried an old cartridge that may have been sitting in the ink box, possibly in an open wrapper",
-                    "- POC took a cartridge from another printer",
-                    "- Sometimes on install of a cartridge, the printer does an ink cleaning which may have depleted the rest of the ink",
-                    "- POC thinks the cartridge is full since it feels and sounds like there is plenty of ink in it",
-                    "- The cartridges have multiple colors, and if one color runs out, it no longer prints any color",
-                    "- The cartridges have a well for spent ink that's used during ink cleanings, and that will make the cartridge seem full"
-                ]
+            special_notes=(
+                _NO_TEST_COUP_NOTE,
+                "FOLLOW STANDARD POC UNWILLING PROCESS: L1C POC Unwilling to Assist",
+                "IF POC IS INSISTENT IN SENDING A TECH RIGHT AWAY: Agents need to escalate to a SME if a non-flagship store is demanding dispatch"
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="Ink Out / NR Error",
+            caller_issue_type="Printer Making Sounds / Error light on printer / poor print quality / Blank Prints",
+            resolution="Loaded Ink",
+            impacted_equipment="CMC6",
+            call_recording_id=3,
+            detailed_steps=(
+                "Call the store and ask if they have a new, unopened ink cartridge available",
+                "If yes, have them remove the old cartridge and open a fresh one from the sealed package while you're on the phone",
+                "For CMC9 cartridges, they're in a brown box with bright yellow Catalina labels",
+                "Install the new cartridge and close the ink door",
+                "The printer will automatically run a cleaning cycle (about 60 seconds) - the status light will flash",
+                "If the new cartridge doesn't work, try one from a working printer to test if it's a bad cartridge",
+                "If the store is out of ink, note that in the ticket and check on ink delivery status",
+                "Once the ink is replaced, check that the printer shows ready",
+                *_TEST_PRINT_STEPS
             ),
-            PrinterIssue(
-                system_alert_type="NR Error",
-                caller_issue_type="poor print quality / Blank Prints",
-                resolution="Ink Cleaning",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 4",
-                detailed_steps=[
-                    "For Walgreens Mail Listen tickets, run an ink cleaning cycle before calling and send the ink cleaning email",
-                    "Let the store know you'll be doing a full remote ink cleaning",
-                    "If the printer beeps for no ink, have them replace it with a new cartridge from a sealed package",
-                    "If it beeps for no paper, have them replace it with a new roll",
-                    "Don't worry if blank paper comes out during cleaning - that's normal, just check the final test print with the barcode",
-                    "After the cleaning cycle completes, check the print quality",
-                    "If the print quality looks good, you're done!",
-                    "If it's still not good, you may need to order a replacement printer or dispatch a tech depending on the printer model"
-                ],
-                special_notes=[
-                    "CMC6 Ink Cleaning",
-                    "For Kroger Chains: Blank coupon - Dispatch to replace the Printer if the issue happens again for the same printer",
-                    "For Kroger Chains: Poor Print - Do not dispatch if the issue is resolved remotely"
-                ]
+            special_notes=(
+                "Reasons why some cartridges will not work:",
+                "- The cartridge is defective",
+                "- POC tried an old cartridge that may have been sitting in the ink box, possibly in an open wrapper",
+                "- POC took a cartridge from another printer",
+                "- Sometimes on install of a cartridge, the printer does an ink cleaning which may have depleted the rest of the ink",
+                "- POC thinks the cartridge is full since it feels and sounds like there is plenty of ink in it",
+                "- The cartridges have multiple colors, and if one color runs out, it no longer prints any color",
+                "- The cartridges have a well for spent ink that's used during ink cleanings, and that will make the cartridge seem full"
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="NR Error",
+            caller_issue_type="poor print quality / Blank Prints",
+            resolution="Ink Cleaning",
+            impacted_equipment="CMC6",
+            call_recording_id=4,
+            detailed_steps=(
+                "For Walgreens Mail Listen tickets, run an ink cleaning cycle before calling and send the ink cleaning email",
+                "Let the store know you'll be doing a full remote ink cleaning",
+                "If the printer beeps for no ink, have them replace it with a new cartridge from a sealed package",
+                "If it beeps for no paper, have them replace it with a new roll",
+                "Don't worry if blank paper comes out during cleaning - that's normal, just check the final test print with the barcode",
+                "After the cleaning cycle completes, check the print quality",
+                "If the print quality looks good, you're done!",
+                "If it's still not good, you may need to order a replacement printer or dispatch a tech depending on the printer model"
             ),
-            PrinterIssue(
-                system_alert_type="PC No Comm",
-                caller_issue_type="Store not printing / Promos not printing",
-                resolution="PC Reboot",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 5",
-                detailed_steps=[
-                    "Try connecting to the store first - if it connects, check the store vitals",
-                    "If you can't connect, call the store and let them know you need help checking the Catalina PC",
-                    "The PC looks like a regular desktop computer tower with a blue & white 'Property of Catalina Marketing' sticker",
-                    "It usually has a monitor and keyboard attached - most stores use a 9-inch TVS monitor",
-                    "Use the storemaster list to find the PC details if needed",
-                    "Have them reboot the PC: press and hold the power button until it turns off, wait 45-60 seconds, then press it again to turn it back on",
-                    "Check if the PC has power - look for a green light on the tower and see what's on the monitor",
-                    "If there's no power, have them check the power cord connections and that the outlet works",
-                    "Try connecting to the store again after the reboot",
-                    "If it still won't connect after 2-3 minutes, you'll need to dispatch a tech to reload the software",
-                    "If the PC gives boot options, select Linux. If it goes to Emergency Mode or won't boot properly, dispatch a tech",
-                    "Once connected, check the store vitals - if everything looks good, you're done!"
-                ],
-                special_notes=[
-                    "For WAGs Mail Listen tickets opened for a Printer issue but showing No Comm, the agent needs to defer and reconnect after 30 minutes to check the PC's connectivity",
-                    "If the PC is still No Comm AND the Incident Request/Description Field states 'Poor Print Quality/Printing Blank Printer', then:",
-                    "- Add to the Tech Special Instructions: 'Please attempt to resolve Poor Print Issue on TID XX.'",
-                    "- Move the ticket to the US_L1_FSV_BREAKFIX queue",
-                    "- Click the dispatch equipment button and click save"
-                ]
+            special_notes=(
+                "CMC6 Ink Cleaning",
+                "For Kroger Chains: Blank coupon - Dispatch to replace the Printer if the issue happens again for the same printer",
+                "For Kroger Chains: Poor Print - Do not dispatch if the issue is resolved remotely"
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="PC No Comm",
+            caller_issue_type="Store not printing / Promos not printing",
+            resolution="PC Reboot",
+            impacted_equipment="CMC6",
+            call_recording_id=5,
+            detailed_steps=(
+                "Try connecting to the store first - if it connects, check the store vitals",
+                "If you can't connect, call the store and let them know you need help checking the Catalina PC",
+                "The PC looks like a regular desktop computer tower with a blue & white 'Property of Catalina Marketing' sticker",
+                "It usually has a monitor and keyboard attached - most stores use a 9-inch TVS monitor",
+                "Use the storemaster list to find the PC details if needed",
+                "Have them reboot the PC: press and hold the power button until it turns off, wait 45-60 seconds, then press it again to turn it back on",
+                "Check if the PC has power - look for a green light on the tower and see what's on the monitor",
+                "If there's no power, have them check the power cord connections and that the outlet works",
+                "Try connecting to the store again after the reboot",
+                "If it still won't connect after 2-3 minutes, you'll need to dispatch a tech to reload the software",
+                "If the PC gives boot options, select Linux. If it goes to Emergency Mode or won't boot properly, dispatch a tech",
+                "Once connected, check the store vitals - if everything looks good, you're done!"
             ),
-            PrinterIssue(
-                system_alert_type="NR Error",
-                caller_issue_type="Printer Wont Power On / Printer not Printing / Promo not printing",
-                resolution="Plugged-in Printer Power Cord",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 6",
-                detailed_steps=[
-                    "Ask them to check the lights on the front of the printer - is the power light solid green, blinking, or off?",
-                    "Also have them check the lights on the printer server (the small box on the back) - the Ethernet, Status, and USB lights should be green (the wireless light is always blank)",
-                    "If the power light is solid green: have them remove the back cover and tell you the color of each light on the printer server",
-                    "If the power light is blinking: have them press and hold the reset button until paper advances, then try pinging the printer",
-                    "If the power light is off: check if the lane has power first, then have them check the power cable connection in the bottom right corner",
-                    "To power cycle the printer: disconnect the power cord for 30 seconds (you may need to disconnect the USB and printer server wires first to access it)",
-                    "Reconnect all the wires - the power cord has an arrow on the flat side that should face outward",
-                    "Reseat the Ethernet and printer server wires on the printer server box",
-                    "Check all the lights again - they should all be green",
-                    "If any light is red, have them disconnect and reconnect that cable (Ethernet or USB) - it should turn orange then green",
-                    "If the printer still won't respond after all this, you may need to restart the service or dispatch",
-                    "If the printer shows an error (like a paper jam), follow the paper jam clearing steps"
-                ],
-                special_notes=[
-                    "For all 'No Response' tickets, the POC must always be instructed to remove the back cover of the printer and confirm that all five wires are fully plugged into the ports on the back of the printer",
-                    "For HEB Stores (Chain 214): Refer to special handling note",
-                    "Agent must log into Putty and verify the printer status",
-                    "If printer status shows 'Error,' refer to Section 5"
-                ]
+            special_notes=(
+                "For WAGs Mail Listen tickets opened for a Printer issue but showing No Comm, the agent needs to defer and reconnect after 30 minutes to check the PC's connectivity",
+                "If the PC is still No Comm AND the Incident Request/Description Field states 'Poor Print Quality/Printing Blank Printer', then:",
+                "- Add to the Tech Special Instructions: 'Please attempt to resolve Poor Print Issue on TID XX.'",
+                "- Move the ticket to the US_L1_FSV_BREAKFIX queue",
+                "- Click the dispatch equipment button and click save"
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="NR Error",
+            caller_issue_type="Printer Wont Power On / Printer not Printing / Promo not printing",
+            resolution="Plugged-in Printer Power Cord",
+            impacted_equipment="CMC6",
+            call_recording_id=6,
+            detailed_steps=(
+                "Ask them to check the lights on the front of the printer - is the power light solid green, blinking, or off?",
+                "Also have them check the lights on the printer server (the small box on the back) - the Ethernet, Status, and USB lights should be green (the wireless light is always blank)",
+                "If the power light is solid green: have them remove the back cover and tell you the color of each light on the printer server",
+                "If the power light is blinking: have them press and hold the reset button until paper advances, then try pinging the printer",
+                "If the power light is off: check if the lane has power first, then have them check the power cable connection in the bottom right corner",
+                "To power cycle the printer: disconnect the power cord for 30 seconds (you may need to disconnect the USB and printer server wires first to access it)",
+                "Reconnect all the wires - the power cord has an arrow on the flat side that should face outward",
+                "Reseat the Ethernet and printer server wires on the printer server box",
+                "Check all the lights again - they should all be green",
+                "If any light is red, have them disconnect and reconnect that cable (Ethernet or USB) - it should turn orange then green",
+                "If the printer still won't respond after all this, you may need to restart the service or dispatch",
+                "If the printer shows an error (like a paper jam), follow the paper jam clearing steps"
             ),
-            PrinterIssue(
-                system_alert_type="Printer Shows Offline (But Firmware Good)",
-                caller_issue_type="Printer Not Printing",
-                resolution="Printer SW - Not Commable (Restart Services)",
-                impacted_equipment="CMC6",
-                call_recording_needed=True,
-                call_recording_id="CALL 7",
-                detailed_steps=[
-                    "Log into Putty and check the printer status",
-                    "If the printer shows as working in Putty but still shows offline in the system, close the ticket and email the Customer Service Desk that the Store Master List didn't update",
-                    "Printer status meanings:",
-                    "  - Idle = ready to print",
-                    "  - Busy = printing or cleaning",
-                    "  - Offline = power or ethernet cable likely unplugged",
-                    "  - Error = likely a paper jam or mechanical issue",
-                    "To send a test print, type 'Coup <Lane#>' and press enter",
-                    "If the printer is still offline after troubleshooting, you may need to order a replacement or dispatch a tech depending on the printer model"
-                ],
-                special_notes=[
-                    "DO NOT TOUCH/Rework Tickets: Agents are instructed not to touch or rework tickets that have specific notes in the Resolution field",
-                    "When a ticket is due for closure, dispatch, or escalation, any notes related to these actions should be removed from the Resolution field if they are no longer applicable",
-                    "See Store 3.0 Agents Special Instructions for further guidance"
-                ]
+            special_notes=(
+                "For all 'No Response' tickets, the POC must always be instructed to remove the back cover of the printer and confirm that all five wires are fully plugged into the ports on the back of the printer",
+                "For HEB Stores (Chain 214): Refer to special handling note",
+                "Agent must log into Putty and verify the printer status",
+                "If printer status shows 'Error,' refer to Section 5"
+            )
+        ),
+        PrinterIssue(
+            system_alert_type="Printer Shows Offline (But Firmware Good)",
+            caller_issue_type="Printer Not Printing",
+            resolution="Printer SW - Not Commable (Restart Services)",
+            impacted_equipment="CMC6",
+            call_recording_id=7,
+            detailed_steps=(
+                "Log into Putty and check the printer status",
+                "If the printer shows as working in Putty but still shows offline in the system, close the ticket and email the Customer Service Desk that the Store Master List didn't update",
+                "Printer status meanings:",
+                "  - Idle = ready to print",
+                "  - Busy = printing or cleaning",
+                "  - Offline = power or ethernet cable likely unplugged",
+                "  - Error = likely a paper jam or mechanical issue",
+                "To send a test print, type 'Coup <Lane#>' and press enter",
+                "If the printer is still offline after troubleshooting, you may need to order a replacement or dispatch a tech depending on the printer model"
             ),
-        ]
+            special_notes=(
+                "DO NOT TOUCH/Rework Tickets: Agents are instructed not to touch or rework tickets that have specific notes in the Resolution field",
+                "When a ticket is due for closure, dispatch, or escalation, any notes related to these actions should be removed from the Resolution field if they are no longer applicable",
+                "See Store 3.0 Agents Special Instructions for further guidance"
+            )
+        ),
+    )
+
+
+# Lowercase alphanumeric tokens (compiled for performance)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Phrases that weigh more when they appear in both the caller's description
+# and the caller issue type (see search_by_caller_description)
+_COMMON_PHRASES = (
+    "paper", "ink", "printing", "error", "offline",
+    "power", "sound", "quality", "blank", "promo", "jam",
+    "mechanical", "no response", "not printing", "wont power"
+)
+# One bit per common phrase, so phrase hits can be compared as bitmasks
+_COMMON_PHRASE_BITS = {phrase: 1 << bit for bit, phrase in enumerate(_COMMON_PHRASES)}
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _bloom_bits(token: str) -> int:
+    """Two bit positions (of 256) for a token in the KB Bloom filter"""
+    h = hash(token)
+    return (1 << (h & 255)) | (1 << ((h >> 8) & 255))
+
+
+class _KBIndex(NamedTuple):
+    """Lookup structures derived from the issue table (read-only views)"""
+    # Resolution is unique per issue and serves as the KB's primary key
+    by_resolution: Mapping[str, PrinterIssue]
+    # Agent workflows narrow by equipment model first, so keep its issue
+    # indices ready rather than filtering the whole table per query
+    by_equipment: Mapping[str, Tuple[int, ...]]
+    by_system_alert: Mapping[str, Tuple[int, ...]]
+    by_caller_issue: Mapping[str, Tuple[int, ...]]
+    # (alert, caller issue) -> issue index, for routing a ticket in one probe
+    by_pair: Mapping[Tuple[str, str], int]
+    # Lowercase alert / caller issue types, parallel to the issue tuple
+    alert_lower: Tuple[str, ...]
+    caller_lower: Tuple[str, ...]
+    # Bitmask of the common phrases in each caller issue type, parallel to the issue tuple
+    common_phrase_masks: Tuple[int, ...]
+    token_index: Mapping[str, FrozenSet[int]]
+    # Lowercase alert / caller issue phrases ("/"-separated parts) -> issue indices
+    phrase_issues: Mapping[str, Tuple[int, ...]]
+    # 256-bit Bloom filter over every indexed token; lets search() reject
+    # queries that share no token with the KB without probing the index
+    token_bloom: int
+
+
+@lru_cache(maxsize=None)
+def _get_index() -> _KBIndex:
+    """Build the lookup indexes over the issue table (once, on first use)"""
+    issues = _build_issues()
+    by_equipment: Dict[str, List[int]] = defaultdict(list)
+    by_system_alert: Dict[str, List[int]] = defaultdict(list)
+    by_caller_issue: Dict[str, List[int]] = defaultdict(list)
+    token_index: Dict[str, set] = defaultdict(set)
+    phrase_issues: Dict[str, List[int]] = defaultdict(list)
+    by_pair: Dict[Tuple[str, str], int] = {}
+    
+    for idx, issue in enumerate(issues):
+        by_equipment[issue.impacted_equipment].append(idx)
+        by_system_alert[issue.system_alert_type.lower()].append(idx)
+        by_caller_issue[issue.caller_issue_type.lower()].append(idx)
+        by_pair.setdefault((issue.system_alert_type.lower(), issue.caller_issue_type.lower()), idx)
+        text = f"{issue.system_alert_type} {issue.caller_issue_type} {issue.resolution}"
+        for token in _tokenize(text):
+            token_index[token].add(idx)
+        for value in (issue.system_alert_type, issue.caller_issue_type):
+            for phrase in value.lower().split("/"):
+                phrase = phrase.strip()
+                if phrase and idx not in phrase_issues[phrase]:
+                    phrase_issues[phrase].append(idx)
+    
+    alert_lower = tuple(issue.system_alert_type.lower() for issue in issues)
+    caller_lower = tuple(issue.caller_issue_type.lower() for issue in issues)
+    token_bloom = 0
+    for token in token_index:
+        token_bloom |= _bloom_bits(token)
     
-    def search_by_caller_description(self, description: str) -> List[PrinterIssue]:
+    return _KBIndex(
+        by_resolution=MappingProxyType({issue.resolution.lower(): issue for issue in issues}),
+        by_equipment=MappingProxyType({equipment: tuple(indices) for equipment, indices in by_equipment.items()}),
+        by_system_alert=MappingProxyType({alert: tuple(indices) for alert, indices in by_system_alert.items()}),
+        by_caller_issue=MappingProxyType({caller: tuple(indices) for caller, indices in by_caller_issue.items()}),
+        by_pair=MappingProxyType(by_pair),
+        alert_lower=alert_lower,
+        caller_lower=caller_lower,
+        common_phrase_masks=tuple(_common_phrase_mask(text) for text in caller_lower),
+        token_index=MappingProxyType({token: frozenset(indices) for token, indices in token_index.items()}),
+        phrase_issues=MappingProxyType({phrase: tuple(indices) for phrase, indices in phrase_issues.items()}),
+        token_bloom=token_bloom,
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_phrase_automaton():
+    """Aho-Corasick automaton over all KB phrases (requires pyahocorasick)"""
+    automaton = ahocorasick.Automaton()
+    for phrase in _get_index().phrase_issues:
+        automaton.add_word(phrase, phrase)
+    automaton.make_automaton()
+    return automaton
+
+
+@lru_cache(maxsize=None)
+def _get_common_phrase_automaton():
+    """Aho-Corasick automaton over _COMMON_PHRASES, yielding their bits (requires pyahocorasick)"""
+    automaton = ahocorasick.Automaton()
+    for phrase, bit in _COMMON_PHRASE_BITS.items():
+        automaton.add_word(phrase, bit)
+    automaton.make_automaton()
+    return automaton
+
+
+def _common_phrase_mask(text_lower: str) -> int:
+    """Bitmask of the common phrases that occur in the text, found in a single pass when possible"""
+    mask = 0
+    if AHOCORASICK_AVAILABLE:
+        for _, bit in _get_common_phrase_automaton().iter(text_lower):
+            mask |= bit
+    else:
+        for phrase, bit in _COMMON_PHRASE_BITS.items():
+            if phrase in text_lower:
+                mask |= bit
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _get_phrase_pattern() -> Tuple["re.Pattern", Dict[str, Tuple[str, ...]]]:
+    """
+    One regex alternation over all KB phrases, longest first. The lookahead
+    reports a match at every position, so overlapping phrases are all found;
+    phrases that are a prefix of a longer match are mapped alongside it.
+    """
+    phrases = sorted(_get_index().phrase_issues, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(re.escape(p) for p in phrases) + "))")
+    prefixes = {
+        phrase: tuple(other for other in phrases if other != phrase and phrase.startswith(other))
+        for phrase in phrases
+    }
+    return pattern, prefixes
+
+
+def _match_phrases(text_lower: str) -> FrozenSet[int]:
+    """Indices of issues with an alert / caller issue phrase found in the text"""
+    phrase_issues = _get_index().phrase_issues
+    if AHOCORASICK_AVAILABLE:
+        found = {phrase for _, phrase in _get_phrase_automaton().iter(text_lower)}
+    else:
+        pattern, prefixes = _get_phrase_pattern()
+        found = set()
+        for match in pattern.finditer(text_lower):
+            found.add(match.group(1))
+            found.update(prefixes[match.group(1)])
+    return frozenset(idx for phrase in found for idx in phrase_issues[phrase])
+
+
+@lru_cache(maxsize=1024)
+def _keyword_issues(keyword: str) -> Tuple[int, ...]:
+    """Indices of issues whose lowercase caller issue type contains the keyword"""
+    return tuple(idx for idx, text in enumerate(_get_index().caller_lower) if keyword in text)
+
+
+@lru_cache(maxsize=256)
+def _alert_issues(alert_lower: str) -> Tuple[int, ...]:
+    """Indices of issues whose lowercase alert contains, or is contained in, the query"""
+    return tuple(
+        idx for idx, text in enumerate(_get_index().alert_lower)
+        if alert_lower in text or text in alert_lower
+    )
+
+
+@lru_cache(maxsize=512)
+def _search(query: str) -> Tuple[PrinterIssue, ...]:
+    """Token search over the KB; memoized since the KB is immutable"""
+    index = _get_index()
+    candidates = []
+    for token in _tokenize(query):
+        bits = _bloom_bits(token)
+        if index.token_bloom & bits == bits:
+            candidates.append(token)
+    if not candidates:
+        return ()
+    
+    postings = [index.token_index[token] for token in candidates if token in index.token_index]
+    if not postings:
+        return ()
+    
+    issues = _build_issues()
+    hits = frozenset.intersection(*postings)
+    return tuple(issues[i] for i in sorted(hits))
+
+
+def preload() -> None:
+    """
+    Build the issue table and indexes now instead of on first use. Call it
+    in the parent of a pre-forking server (e.g. gunicorn --preload) so forked
+    workers inherit the built KB rather than each building their own.
+    """
+    _get_index()
+    if AHOCORASICK_AVAILABLE:
+        _get_phrase_automaton()
+        _get_common_phrase_automaton()
+    else:
+        _get_phrase_pattern()
+
+
+class PrinterKnowledgeBase:
+    """Knowledge base for printer issues and resolutions with detailed troubleshooting steps"""
+    
+    @cached_property
+    def issues(self) -> Tuple[PrinterIssue, ...]:
+        """All printer issues, built on first access"""
+        return _build_issues()
+    
+    def search_by_caller_description(self, description: str, top_k: Optional[int] = None) -> List[PrinterIssue]:
         """
         Search for printer issues by caller's description of the problem.
-        Returns matching issues ordered by relevance.
+        Returns matching issues ordered by relevance, only the best top_k if given.
+        """
+        return self.search_many([description], top_k)[0]
+    
+    def search_many(self, descriptions: List[str], top_k: Optional[int] = None) -> List[List[PrinterIssue]]:
         """
-        description_lower = description.lower()
-        matches = []
+        Search for printer issues for several caller descriptions at once,
+        sharing the index lookups. Returns one relevance-ordered list per input,
+        each cut to the best top_k if given.
+        """
+        issues = self.issues
+        common_phrase_masks = _get_index().common_phrase_masks
+        scores: Counter = Counter()
+        results = []
         
-        for issue in self.issues:
-            score = 0
-            caller_issue_lower = issue.caller_issue_type.lower()
+        for description in descriptions:
+            description_lower = description.lower()
+            scores.clear()
             
-            # Check for keyword matches
-            keywords = description_lower.split()
-            for keyword in keywords:
-                if len(keyword) > 3:  # Ignore short words
-                    if keyword in caller_issue_lower:
-                        score += 1
+            # Keyword matches: substring of the caller issue type, via cached postings.
+            # Repeated keywords each count, so walk each distinct keyword's postings once
+            keywords = Counter(keyword for keyword in description_lower.split() if len(keyword) > 3)
+            for keyword, count in keywords.items():
+                for idx in _keyword_issues(keyword):
+                    scores[idx] += count
             
-            # Check for common phrases
-            common_phrases = [
-                "paper", "ink", "printing", "error", "offline", 
-                "power", "sound", "quality", "blank", "promo", "jam",
-                "mechanical", "no response", "not printing", "wont power"
-            ]
-            for phrase in common_phrases:
-                if phrase in description_lower and phrase in caller_issue_lower:
-                    score += 2
+            # Common phrases in both the description and the caller issue type:
+            # AND the phrase bitmasks and count the shared bits
+            query_mask = _common_phrase_mask(description_lower)
+            if query_mask:
+                for idx, issue_mask in enumerate(common_phrase_masks):
+                    shared = query_mask & issue_mask
+                    if shared:
+                        scores[idx] += 2 * shared.bit_count()
             
-            if score > 0:
-                matches.append((score, issue))
+            # Sort by score (highest first), ties in knowledge base order;
+            # a heap selects the top_k without sorting every match
+            order = [(-score, idx) for idx, score in scores.items()]
+            if top_k is None:
+                order.sort()
+            else:
+                order = heapq.nsmallest(top_k, order)
+            ranked = [idx for _, idx in order]
+            results.append([issues[idx] for idx in ranked])
         
-        # Sort by score (highest first)
-        matches.sort(key=lambda x: x[0], reverse=True)
-        return [issue for _, issue in matches]
+        return results
     
     def search_by_system_alert(self, alert_type: str) -> List[PrinterIssue]:
         """Search for printer issues by system alert type"""
-        alert_lower = alert_type.lower()
-        matches = []
-        
-        for issue in self.issues:
-            if alert_lower in issue.system_alert_type.lower() or issue.system_alert_type.lower() in alert_lower:
-                matches.append(issue)
-        
-        return matches
+        return [self.issues[idx] for idx in _alert_issues(alert_type.lower())]
+    
+    def find_by_resolution(self, resolution: str) -> Optional[PrinterIssue]:
+        """Get the issue with the given resolution (case-insensitive)"""
+        return _get_index().by_resolution.get(resolution.lower())
+    
+    def find_by_equipment(self, equipment: str) -> Tuple[PrinterIssue, ...]:
+        """Get issues affecting the given equipment model (e.g. "CMC6")"""
+        return tuple(self.issues[i] for i in _get_index().by_equipment.get(equipment, ()))
+    
+    def find_by_system_alert(self, alert_type: str) -> Tuple[PrinterIssue, ...]:
+        """Get issues whose system alert type matches exactly (case-insensitive)"""
+        return tuple(self.issues[i] for i in _get_index().by_system_alert.get(alert_type.lower(), ()))
+    
+    def find_by_caller_issue(self, caller_issue: str) -> Tuple[PrinterIssue, ...]:
+        """Get issues whose caller issue type matches exactly (case-insensitive)"""
+        return tuple(self.issues[i] for i in _get_index().by_caller_issue.get(caller_issue.lower(), ()))
+    
+    def find_by_alert_and_caller_issue(self, alert_type: str, caller_issue: str) -> Optional[PrinterIssue]:
+        """Get the issue with exactly this system alert and caller issue type (case-insensitive)"""
+        idx = _get_index().by_pair.get((alert_type.lower(), caller_issue.lower()))
+        return self.issues[idx] if idx is not None else None
+    
+    def search(self, text: str) -> Tuple[PrinterIssue, ...]:
+        """
+        Find issues whose alert type, caller issue type or resolution contain
+        every known token of the query. Unknown tokens are ignored.
+        """
+        # Normalize before hitting the cache so "Paper  Jam" and "paper jam" share an entry
+        return _search(" ".join(text.lower().split()))
+    
+    def match_text(self, text: str) -> Tuple[PrinterIssue, ...]:
+        """
+        Find issues whose alert type or caller issue phrases (e.g. "paper not
+        coming out", "pc no comm") appear anywhere in free-form text
+        """
+        hits = _match_phrases(text.lower())
+        return tuple(self.issues[i] for i in sorted(hits))
     
-    def get_all_issues(self) -> List[PrinterIssue]:
+    def get_all_issues(self) -> Tuple[PrinterIssue, ...]:
         """Get all printer issues"""
         return self.issues
     
+    def as_dict(self, issue: PrinterIssue) -> Dict[str, Any]:
+        """
+        Dict describing an issue for the agent's tool results. Issues are
+        immutable, so the fields are built once; each call gets its own dict
+        whose values (strings, bools, tuples) can't be changed in place.
+        """
+        cached = _ISSUE_DICTS.get(issue)
+        if cached is None:
+            result = {
+                "system_alert_type": issue.system_alert_type,
+                "caller_issue_type": issue.caller_issue_type,
+                "resolution": issue.resolution,
+                "impacted_equipment": issue.impacted_equipment,
+                "call_recording_needed": bool(issue.call_recording_id),
+                "resolution_steps": tuple(self.get_resolution_steps(issue)),
+            }
+            if issue.special_notes:
+                result["special_notes"] = issue.special_notes
+            cached = _ISSUE_DICTS[issue] = MappingProxyType(result)
+        return dict(cached)
+    
     def get_resolution_steps(self, issue: PrinterIssue) -> List[str]:
         """Get detailed resolution steps for an issue"""
         if issue.detailed_steps:
-            return issue.detailed_steps
+            return list(issue.detailed_steps)
         
         # Fallback to basic steps if detailed_steps not available
-        resolution_steps = {
-            "Loaded Paper": [
-                "Open the paper tray and check if paper is loaded correctly",
-                "Make sure the paper is aligned properly",
-                "Close the tray and send a test print to verify it's working"
-            ],
-            "Cleared Paper Jam": [
-                "Turn off the printer and open all access panels",
-                "Gently remove any jammed paper and check for torn pieces",
-                "Close all panels, turn the printer back on, and test print"
-            ],
-            "Loaded Ink": [
-                "Open the ink cartridge door and remove the old cartridge",
-                "Install the new cartridge making sure it's seated properly",
-                "Close the door and let the printer run its cleaning cycle",
-                "Send a test print to verify everything is working"
-            ],
-            "Ink Cleaning": [
-                "Access the printer maintenance menu",
-                "Select the ink cleaning option and follow the prompts",
-                "Wait for the cleaning cycle to finish, then test print"
-            ],
-            "PC Reboot": [
-                "Restart the PC and wait for it to fully boot up",
-                "Check that the printer connection is working",
-                "Send a test print to verify everything is resolved"
-            ],
-            "Plugged-in Printer Power Cord": [
-                "Check that the power cord is connected to both the printer and the outlet",
-                "Make sure the outlet has power and the printer switch is on",
-                "Test that the printer powers on correctly"
-            ],
-            "Printer SW - Not Commable (Restart Services)": [
-                "Access the printer service settings",
-                "Restart the printer service and wait a moment",
-                "Check that the service is running and the printer is connected",
-                "Send a test print to verify everything is working"
-            ]
-        }
-        
-        return resolution_steps.get(issue.resolution, [
-            f"Follow the resolution steps for: {issue.resolution}"
-        ])
+        return list(_FALLBACK_RESOLUTION_STEPS.get(issue.resolution, (
+            f"Follow the resolution steps for: {issue.resolution}",
+        )))
@@ -0,0 +1,167 @@
+import os
+import pickle
+import random
+import subprocess
+import sys
+
+import pytest
+
+import printer_knowledge_base
+from printer_knowledge_base import PrinterKnowledgeBase
+
+# The original linear-scan search, kept as the reference the indexed search
+# must agree with
+COMMON_PHRASES = [
+    "paper", "ink", "printing", "error", "offline",
+    "power", "sound", "quality", "blank", "promo", "jam",
+    "mechanical", "no response", "not printing", "wont power",
+]
+
+
+def reference_search_by_caller_description(issues, description):
+    description_lower = description.lower()
+    matches = []
+    for issue in issues:
+        score = 0
+        caller_issue_lower = issue.caller_issue_type.lower()
+        for keyword in description_lower.split():
+            if len(keyword) > 3 and keyword in caller_issue_lower:
+                score += 1
+        for phrase in COMMON_PHRASES:
+            if phrase in description_lower and phrase in caller_issue_lower:
+                score += 2
+        if score > 0:
+            matches.append((score, issue))
+    matches.sort(key=lambda x: x[0], reverse=True)
+    return [issue for _, issue in matches]
+
+
+def reference_search_by_system_alert(issues, alert_type):
+    alert_lower = alert_type.lower()
+    return [
+        issue
+        for issue in issues
+        if alert_lower in issue.system_alert_type.lower()
+        or issue.system_alert_type.lower() in alert_lower
+    ]
+
+
+@pytest.fixture(scope="module")
+def kb() -> PrinterKnowledgeBase:
+    return PrinterKnowledgeBase()
+
+
+def _random_queries(kb: PrinterKnowledgeBase, count: int) -> list[str]:
+    words = " ".join(
+        f"{issue.caller_issue_type} {issue.system_alert_type} {issue.resolution}"
+        for issue in kb.issues
+    ).lower().split()
+    words += [
+        "printing,", "paper!", "no", "response", "wont", "power", "the", "jam",
+        "promos", "xyz", "Not", "PRINTING", "offline.", "sounds",
+    ]
+    rng = random.Random(1)
+    queries = []
+    for _ in range(count):
+        query = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        queries.append(query.upper() if rng.random() < 0.3 else query)
+    return queries
+
+
+def test_caller_description_search_matches_reference(kb: PrinterKnowledgeBase) -> None:
+    """The indexed search ranks issues exactly like the original linear scan."""
+    for query in _random_queries(kb, 5000):
+        assert kb.search_by_caller_description(query) == (
+            reference_search_by_caller_description(kb.issues, query)
+        ), query
+
+
+def test_system_alert_search_matches_reference(kb: PrinterKnowledgeBase) -> None:
+    """Alert search agrees with the original substring scan, both directions."""
+    queries = _random_queries(kb, 5000)
+    for issue in kb.issues:
+        alert = issue.system_alert_type
+        queries += [alert, alert.upper(), f"alert: {alert} (lane 3)"]
+    queries += ["nr", "error", ""]
+    for query in queries:
+        assert kb.search_by_system_alert(query) == (
+            reference_search_by_system_alert(kb.issues, query)
+        ), query
+
+
+def test_top_k_is_prefix_of_full_ranking(kb: PrinterKnowledgeBase) -> None:
+    """top_k keeps the best matches in the same order as the full ranking."""
+    for query in _random_queries(kb, 1000):
+        full = kb.search_by_caller_description(query)
+        for top_k in (1, 3):
+            assert kb.search_by_caller_description(query, top_k=top_k) == full[:top_k]
+
+
+def test_search_many_matches_single_searches(kb: PrinterKnowledgeBase) -> None:
+    """Batched search returns the same lists as searching one at a time."""
+    queries = _random_queries(kb, 200)
+    assert kb.search_many(queries) == [
+        kb.search_by_caller_description(query) for query in queries
+    ]
+
+
+def test_lookups_by_exact_fields(kb: PrinterKnowledgeBase) -> None:
+    """Exact-field lookups find every issue, case-insensitively."""
+    for issue in kb.issues:
+        assert kb.find_by_resolution(issue.resolution.upper()) is issue
+        assert issue in kb.find_by_system_alert(issue.system_alert_type.lower())
+        assert issue in kb.find_by_caller_issue(issue.caller_issue_type.upper())
+        assert issue in kb.find_by_equipment(issue.impacted_equipment)
+        assert kb.find_by_alert_and_caller_issue(
+            issue.system_alert_type, issue.caller_issue_type
+        ) is issue
+    assert kb.find_by_resolution("no such resolution") is None
+
+
+def test_resolution_steps_prefer_detailed_steps(kb: PrinterKnowledgeBase) -> None:
+    """Issues with detailed steps return exactly those steps."""
+    for issue in kb.issues:
+        steps = kb.get_resolution_steps(issue)
+        assert steps
+        if issue.detailed_steps:
+            assert steps == list(issue.detailed_steps)
+
+
+def _run_with_hash_seed(seed: str, code: str, stdin: bytes = b"") -> bytes:
+    src_dir = os.path.dirname(printer_knowledge_base.__file__)
+    env = {**os.environ, "PYTHONHASHSEED": seed}
+    return subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {src_dir!r}); {code}"],
+        input=stdin, env=env, capture_output=True, check=True,
+    ).stdout
+
+
+def test_pickled_issues_equal_local_issues_across_processes() -> None:
+    """Issues pickled under one hash seed compare and hash equal under another."""
+    pickled = _run_with_hash_seed(
+        "1",
+        "import pickle; from printer_knowledge_base import PrinterKnowledgeBase; "
+        "sys.stdout.buffer.write(pickle.dumps(PrinterKnowledgeBase().issues))",
+    )
+    result = _run_with_hash_seed(
+        "2",
+        "import pickle; from printer_knowledge_base import PrinterKnowledgeBase; "
+        "kb = PrinterKnowledgeBase(); loaded = pickle.loads(sys.stdin.buffer.read()); "
+        "print(loaded == kb.issues and all(hash(a) == hash(b) for a, b in zip(loaded, kb.issues)) "
+        "and {issue: i for i, issue in enumerate(kb.issues)}.keys() >= set(loaded))",
+        stdin=pickled,
+    )
+    assert result.strip() == b"True"
+    assert pickle.loads(pickled) == PrinterKnowledgeBase().issues
+
+
+def test_as_dict_results_cannot_corrupt_the_cache(kb: PrinterKnowledgeBase) -> None:
+    """Changing one caller's result leaves later results untouched."""
+    issue = kb.issues[0]
+    first = kb.as_dict(issue)
+    first["resolution"] = "changed"
+    with pytest.raises(AttributeError):
+        first["resolution_steps"].append("extra step")
+    second = kb.as_dict(issue)
+    assert second["resolution"] == issue.resolution
+    assert list(second["resolution_steps"]) == kb.get_resolution_steps(issue)
@@ -0,0 +1,266 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+import system_tools
+from system_tools import CircuitBreaker, SystemTools
+
+
+class FakeClock:
+    """Stands in for time.monotonic so breaker timeouts can be stepped through."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(system_tools.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_fail_max(clock: FakeClock) -> None:
+    """The breaker stays closed until fail_max consecutive failures."""
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=30.0)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_breaker_half_open_after_reset_timeout(clock: FakeClock) -> None:
+    """After the reset timeout a probe is let through; one failure re-opens it."""
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=30.0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 29.0
+    assert breaker.is_open
+
+    clock.now += 1.0
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_breaker_lets_one_probe_through_when_half_open(clock: FakeClock) -> None:
+    """Only one concurrent caller gets to probe a half-open backend."""
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=30.0)
+    for _ in range(3):
+        breaker.record_failure()
+    assert not breaker.allow_request()
+
+    clock.now += 30.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # A probe that never reports back frees the slot after another timeout
+    clock.now += 30.0
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    clock.now += 30.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_breaker_resets_on_success(clock: FakeClock) -> None:
+    """A successful probe closes the breaker and clears the failure count."""
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=30.0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 30.0
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.failures == 0
+
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def _tools_with_transport(handler) -> SystemTools:
+    tools = SystemTools()
+    tools.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return tools
+
+
+async def test_request_retries_connect_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Connection failures are resent and each attempt counts on the breaker."""
+    monkeypatch.setattr(system_tools, "HTTP_RETRY_BASE_DELAY", 0)
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200)
+
+    tools = _tools_with_transport(handler)
+    breaker = CircuitBreaker(fail_max=5)
+
+    response = await tools._request(breaker, "GET", "http://storemaster/stores/1/2")
+
+    assert response.status_code == 200
+    assert len(attempts) == 3
+    assert breaker.failures == 0
+    await tools.close()
+
+
+async def test_request_does_not_resend_after_read_timeout() -> None:
+    """A PATCH that may already have been applied is not sent again."""
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    tools = _tools_with_transport(handler)
+    breaker = CircuitBreaker(fail_max=5)
+
+    with pytest.raises(httpx.ReadTimeout):
+        await tools._request(
+            breaker, "PATCH", "http://servicenow/api/now/table/incident/INC1",
+            json={"work_notes": "Cleaned ink"},
+        )
+
+    assert len(attempts) == 1
+    assert breaker.failures == 1
+    await tools.close()
+
+
+async def test_request_stops_retrying_once_breaker_opens(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Retries stop as soon as the failed attempts open the breaker."""
+    monkeypatch.setattr(system_tools, "HTTP_RETRY_BASE_DELAY", 0)
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    tools = _tools_with_transport(handler)
+    breaker = CircuitBreaker(fail_max=2)
+
+    with pytest.raises(httpx.ConnectTimeout):
+        await tools._request(breaker, "GET", "http://storemaster/stores/1/2")
+
+    assert len(attempts) == 2
+    assert breaker.is_open
+    await tools.close()
+
+
+@pytest.mark.parametrize(("lane", "expected"), [(3, 3), (0, 0), ("7", 7), (" 12 ", 12)])
+def test_validate_lane_accepts_ints_and_numeric_strings(lane, expected: int) -> None:
+    """Lane numbers from the LLM may arrive as ints or digit strings."""
+    assert SystemTools._validate_lane(lane) == expected
+
+
+@pytest.mark.parametrize(
+    "lane", [3.9, 3.0, True, False, None, -1, "-1", "3.9", "", "3; reboot", [3]]
+)
+def test_validate_lane_rejects_everything_else(lane) -> None:
+    """Anything that isn't a non-negative whole number is refused, not coerced."""
+    with pytest.raises(ValueError):
+        SystemTools._validate_lane(lane)
+
+
+def reference_parse_printer_status(output: str) -> str:
+    """The original first-match-in-priority-order status scan."""
+    output_lower = output.lower()
+    for key, value in system_tools.PRINTER_STATUS_MAP.items():
+        if key.lower() in output_lower:
+            return value
+    return "unknown"
+
+
+@pytest.mark.parametrize(
+    ("output", "expected"),
+    [
+        ("Lane 3: Idle\n", "ready"),
+        ("PRINTER BUSY", "busy"),
+        ("status: Off Line", "offline"),
+        ("Out of Ink", "out_of_ink"),
+        ("Out of Paper Jam", "error"),
+        ("Busy / Error", "busy"),
+        ("", "unknown"),
+        ("no such lane", "unknown"),
+    ],
+)
+def test_parse_printer_status(output: str, expected: str) -> None:
+    """The highest-priority keyword wins, even when keywords overlap."""
+    status = SystemTools.__new__(SystemTools)._parse_printer_status(output)
+    assert status == {"status": expected, "details": output.strip()}
+
+
+def test_parse_printer_status_matches_reference() -> None:
+    """Parsing agrees with the original keyword scan on random outputs."""
+    tools = SystemTools.__new__(SystemTools)
+    words = [*system_tools.PRINTER_STATUS_MAP, "lane", "of", "out", "paper", "ink", "line", "off", "jam", "\n"]
+    rng = random.Random(1)
+    for _ in range(5000):
+        output = "".join(
+            rng.choice(words) + rng.choice(["", " "]) for _ in range(rng.randint(0, 6))
+        )
+        output = rng.choice([output, output.upper(), output.lower()])
+        assert tools._parse_printer_status(output)["status"] == (
+            reference_parse_printer_status(output)
+        ), output
+
+
+class FakeTransport:
+    def __init__(self, active: bool) -> None:
+        self.active = active
+
+    def is_active(self) -> bool:
+        return self.active
+
+
+class FakeConnection:
+    def __init__(self, active: bool) -> None:
+        self.transport = FakeTransport(active)
+        self.closed = False
+
+    def get_transport(self) -> FakeTransport:
+        return self.transport
+
+    def close(self) -> None:
+        self.closed = True
+
+
+async def test_reaper_closes_dead_connections_and_drops_store_state(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Dead connections are closed, and per-store locks don't pile up."""
+    monkeypatch.setattr(system_tools, "SSH_REAPER_INTERVAL", 0)
+    tools = SystemTools()
+    live, dead = FakeConnection(active=True), FakeConnection(active=False)
+    now = system_tools.time.monotonic()
+    tools.ssh_connections = {"1-1": live, "1-2": dead}
+    for key in ("1-1", "1-2", "1-3"):  # 1-3 never connected
+        tools._ssh_locks[key] = asyncio.Lock()
+        tools._ssh_last_used[key] = now
+
+    reaper = asyncio.create_task(tools._reap_ssh_connections())
+    await asyncio.sleep(0.01)
+    reaper.cancel()
+
+    assert dead.closed and not live.closed
+    assert tools.ssh_connections == {"1-1": live}
+    assert set(tools._ssh_locks) == {"1-1"}
+    assert set(tools._ssh_last_used) == {"1-1"}
+    await tools.close()
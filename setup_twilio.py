@@ -16,6 +16,11 @@ from livekit import api
 # Load environment variables
 load_dotenv(dotenv_path=".env")
 
+# E.164 phone number: "+", country code, subscriber number, 8-15 digits total
+E164_PATTERN = re.compile(r'\+[1-9]\d{7,14}')
+# Separators people type in phone numbers, e.g. "+1 (234) 567-8901"
+PHONE_SEPARATORS = re.compile(r'[\s().-]')
+
 
 async def create_inbound_trunk(
     lkapi: api.LiveKitAPI,
@@ -90,7 +95,7 @@ async def create_dispatch_rule(
         )
         # Handle different response structures
         dispatch_rule = response.dispatch_rule if hasattr(response, 'dispatch_rule') else response
-        print(f"✅ Successfully created dispatch rule: {dispatch_rule.dispatch_rule_id}")
+        print(f"✅ Successfully created dispatch rule: {dispatch_rule.sip_dispatch_rule_id}")
         return dispatch_rule
     except Exception as e:
         print(f"❌ Failed to create dispatch rule: {e}")
@@ -113,7 +118,7 @@ async def list_existing_trunks(lkapi: api.LiveKitAPI) -> None:
         print(f"⚠️  Could not list existing trunks: {e}")
 
 
-async def get_project_sip_uri(lkapi: api.LiveKitAPI) -> Optional[str]:
+def get_project_sip_uri(lkapi: api.LiveKitAPI) -> Optional[str]:
     """
     Get the SIP URI from the LiveKit project.
     This is the direct SIP URI you can use for VoIP calling.
@@ -126,10 +131,10 @@ async def get_project_sip_uri(lkapi: api.LiveKitAPI) -> Optional[str]:
         if url:
             # Extract project identifier from URL
             # Format: wss://project-id.livekit.cloud
-            match = re.search(r'wss://([^.]+)\.livekit\.cloud', url)
-            if match:
-                project_id = match.group(1)
-                return f"sip:{project_id}.sip.livekit.cloud"
+            if url.startswith("wss://"):
+                project_id, _, host = url[len("wss://"):].partition(".")
+                if project_id and host.startswith("livekit.cloud"):
+                    return f"sip:{project_id}.sip.livekit.cloud"
     except Exception:
         pass
     return None
@@ -172,8 +177,8 @@ async def main():
         print(f"❌ Failed to connect to LiveKit API: {e}")
         sys.exit(1)
     
-    # Get project SIP URI for VoIP calling
-    project_sip_uri = await get_project_sip_uri(lkapi)
+    # Get project SIP URI for VoIP calling (derived from the URL, no API call)
+    project_sip_uri = get_project_sip_uri(lkapi)
     if project_sip_uri:
         print("📞 Your Project SIP URI (for direct VoIP calling):")
         print(f"   {project_sip_uri}")
@@ -212,85 +217,109 @@ async def main():
         print("❌ Phone number is required")
         sys.exit(1)
     
-    # Ensure phone number starts with +
+    # Drop spaces, dashes, dots and parentheses; ensure it starts with +
+    phone_number = PHONE_SEPARATORS.sub("", phone_number)
     if not phone_number.startswith("+"):
         phone_number = "+" + phone_number
+    if not E164_PATTERN.fullmatch(phone_number):
+        print(f"❌ Phone number {phone_number} is not in E.164 format (e.g., +1234567890)")
+        sys.exit(1)
+    
+    room_prefix = input("Room prefix for calls (default: 'call-'): ").strip()
+    if not room_prefix:
+        room_prefix = "call-"
     
     print()
     
-    # Create trunk
-    try:
-        trunk = await create_inbound_trunk(
+    # The trunk and dispatch rule are independent; create them concurrently
+    trunk, dispatch_rule = await asyncio.gather(
+        create_inbound_trunk(
             lkapi=lkapi,
             name=trunk_name,
             auth_username=sip_username,
             auth_password=sip_password,
             phone_number=phone_number,
-        )
-        sip_endpoint = trunk.uri
-    except Exception as e:
-        print(f"\n❌ Setup failed: {e}")
+        ),
+        create_dispatch_rule(lkapi, room_prefix=room_prefix),
+        return_exceptions=True,
+    )
+    
+    if isinstance(trunk, BaseException):
+        print(f"\n❌ Setup failed: {trunk}")
+        if not isinstance(dispatch_rule, BaseException):
+            # Don't leave a live dispatch rule behind without its trunk
+            try:
+                await lkapi.sip.delete_sip_dispatch_rule(
+                    api.DeleteSIPDispatchRuleRequest(
+                        sip_dispatch_rule_id=dispatch_rule.sip_dispatch_rule_id
+                    )
+                )
+                print("🧹 Removed the dispatch rule created alongside the trunk")
+            except Exception as e:
+                print(f"⚠️  Could not remove dispatch rule {dispatch_rule.sip_dispatch_rule_id}: {e}")
+                print("Delete it manually if you won't retry.")
         await lkapi.aclose()
         sys.exit(1)
+    sip_endpoint = trunk.uri
     
-    print()
-    
-    # Create dispatch rule
-    room_prefix = input("Room prefix for calls (default: 'call-'): ").strip()
-    if not room_prefix:
-        room_prefix = "call-"
-    
-    try:
-        await create_dispatch_rule(lkapi, room_prefix=room_prefix)
-    except Exception as e:
-        print(f"\n⚠️  Trunk created but dispatch rule failed: {e}")
+    if isinstance(dispatch_rule, BaseException):
+        print(f"\n⚠️  Trunk created but dispatch rule failed: {dispatch_rule}")
         print("You may need to create the dispatch rule manually.")
     
-    print()
-    print("=" * 60)
-    print("Setup Complete!")
-    print("=" * 60)
-    print()
+    # Write the closing instructions in one go instead of line by line
+    lines = []
+    out = lines.append
+    
+    out("")
+    out("=" * 60)
+    out("Setup Complete!")
+    out("=" * 60)
+    out("")
     
     # Display SIP URI for VoIP calling
     if sip_endpoint:
-        print("📞 SIP URI for VoIP Calling:")
-        print(f"   {sip_endpoint}")
-        print()
-        print("You can use this SIP URI to call directly from any VoIP client:")
-        print("  - Linphone, Zoiper, MicroSIP, X-Lite, etc.")
-        print("  - Configure your VoIP client with:")
-        print(f"    SIP Server: sip.livekit.cloud")
-        print(f"    Username/URI: {sip_endpoint}")
-        print()
+        out("📞 SIP URI for VoIP Calling:")
+        out(f"   {sip_endpoint}")
+        out("")
+        out("You can use this SIP URI to call directly from any VoIP client:")
+        out("  - Linphone, Zoiper, MicroSIP, X-Lite, etc.")
+        out("  - Configure your VoIP client with:")
+        out(f"    SIP Server: sip.livekit.cloud")
+        out(f"    Username/URI: {sip_endpoint}")
+        out("")
     
-    print("Next steps for Twilio:")
-    print()
-    print("1. Configure Twilio TwiML Bin:")
-    print("   - Go to https://console.twilio.com/")
-    print("   - Navigate to TwiML Bins")
-    print("   - Create a new TwiML Bin with this content:")
-    print()
-    print("   <?xml version=\"1.0\" encoding=\"UTF-8\"?>")
-    print("   <Response>")
-    print("     <Dial>")
-    print(f"       <Sip username=\"{sip_username}\" password=\"{sip_password}\">")
-    print(f"         {sip_endpoint}")
-    print("       </Sip>")
-    print("     </Dial>")
-    print("   </Response>")
-    print()
-    print("2. Configure your Twilio phone number:")
-    print("   - Go to Phone Numbers → Manage → Active numbers")
-    print("   - Click on your phone number")
-    print("   - Under 'A Call Comes In', select the TwiML Bin you created")
-    print("   - Save")
-    print()
-    print("3. Start your agent:")
-    print("   python assistant.py start")
-    print()
-    print("4. Test by calling your Twilio phone number!")
-    print()
+    twiml = f"""\
+   <?xml version="1.0" encoding="UTF-8"?>
+   <Response>
+     <Dial>
+       <Sip username="{sip_username}" password="{sip_password}">
+         {sip_endpoint}
+       </Sip>
+     </Dial>
+   </Response>"""
+    out(f"""\
+Next steps for Twilio:
+
+1. Configure Twilio TwiML Bin:
+   - Go to https://console.twilio.com/
+   - Navigate to TwiML Bins
+   - Create a new TwiML Bin with this content:
+
+{twiml}
+
+2. Configure your Twilio phone number:
+   - Go to Phone Numbers → Manage → Active numbers
+   - Click on your phone number
+   - Under 'A Call Comes In', select the TwiML Bin you created
+   - Save
+
+3. Start your agent:
+   python assistant.py start
+
+4. Test by calling your Twilio phone number!
+""")
+    
+    print("\n".join(lines))
     
     # Close API connection
     await lkapi.aclose()
@@ -7,12 +7,129 @@ Based on CATALINA_AI_VOICE_AGENT_DESIGN.md specifications
 import paramiko
 import httpx
 import asyncio
-from typing import Dict, Optional
+import contextlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional, Tuple
 import logging
 import os
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+# Worker threads for blocking Paramiko I/O (commands against one store share
+# a single authenticated Transport, each on its own channel)
+SSH_EXECUTOR_WORKERS = 8
+
+# Background sweep of cached SSH connections
+SSH_REAPER_INTERVAL = 60  # seconds between sweeps
+SSH_IDLE_TIMEOUT = 600  # close connections unused for this long
+
+# HTTP retry / circuit breaker tuning for StoreMaster and ServiceNow
+HTTP_RETRY_ATTEMPTS = 3
+HTTP_RETRY_BASE_DELAY = 0.2  # seconds, doubled after each failed attempt
+HTTP_RETRY_MAX_DELAY = 2.0
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30.0  # seconds before a probe call is let through
+
+# Printer status keywords in priority order, mapped to normalized status
+PRINTER_STATUS_MAP = {
+    "Idle": "ready",
+    "ready": "ready",
+    "Busy": "busy",
+    "Off Line": "offline",
+    "offline": "offline",
+    "Error": "error",
+    "Paper Jam": "error",
+    "Out of Ink": "out_of_ink",
+    "Out of Paper": "out_of_paper"
+}
+_PRINTER_STATUS_RANKED = [
+    (key.lower(), (rank, status))
+    for rank, (key, status) in enumerate(PRINTER_STATUS_MAP.items())
+]
+# Best (rank, status) for a matched keyword; a keyword that is a prefix of the
+# match was found at the same position too
+PRINTER_STATUS_RANK = {
+    key: min(value for other, value in _PRINTER_STATUS_RANKED if key.startswith(other))
+    for key, _ in _PRINTER_STATUS_RANKED
+}
+# Compiled once for performance. The lookahead reports a match at every
+# position, so overlapping keywords (e.g. "Out of Paper Jam") are all seen.
+PRINTER_STATUS_PATTERN = re.compile(
+    "(?=(" + "|".join(
+        re.escape(key) for key in sorted(PRINTER_STATUS_MAP, key=len, reverse=True)
+    ) + "))",
+    re.IGNORECASE
+)
+
+
+def _exec_blocking(connection: paramiko.SSHClient, command: str) -> Tuple[str, str]:
+    """Run an SSH command and read its output (blocking; runs on the SSH executor)"""
+    stdin, stdout, stderr = connection.exec_command(command)
+    return stdout.read().decode('utf-8'), stderr.read().decode('utf-8')
+
+
+class CircuitBreaker:
+    """
+    Short-circuits calls to a failing backend after consecutive failures,
+    so concurrent callers don't each wait out the full HTTP timeout
+    """
+    
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+    
+    @property
+    def is_open(self) -> bool:
+        """True while calls should be rejected without hitting the backend"""
+        if self.opened_at is None:
+            return False
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return True
+        # Half-open: one probe call at a time is let through (see allow_request);
+        # a probe that never reports back frees the slot after reset_timeout
+        return (self.probe_started_at is not None
+                and now - self.probe_started_at < self.reset_timeout)
+    
+    def allow_request(self) -> bool:
+        """True if a call may go to the backend; claims the probe slot when half-open"""
+        if self.is_open:
+            return False
+        if self.opened_at is not None:
+            self.probe_started_at = time.monotonic()
+        return True
+    
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+    
+    def record_failure(self):
+        """Count a failure, opening the breaker once fail_max is reached"""
+        self.failures += 1
+        if self.failures >= self.fail_max:
+            if self.opened_at is None:
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+            # A failed probe re-opens the breaker for another reset_timeout
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+
 
 class SystemTools:
     """
@@ -21,6 +138,14 @@ class SystemTools:
     
     def __init__(self):
         self.ssh_connections = {}
+        # One lock per store so concurrent first calls share a single handshake
+        self._ssh_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._ssh_last_used: Dict[str, float] = {}
+        # Started on first SSH use, since SystemTools may be built outside a loop
+        self._ssh_reaper: Optional[asyncio.Task] = None
+        self._ssh_executor = ThreadPoolExecutor(
+            max_workers=SSH_EXECUTOR_WORKERS, thread_name_prefix="ssh"
+        )
         self.http_client = httpx.AsyncClient(timeout=30.0)
         
         # API endpoints
@@ -28,9 +153,31 @@ class SystemTools:
         self.servicenow_api = os.getenv("SERVICENOW_API_URL")
         
         # Credentials
+        self.reload_credentials()
+        
+        # Backend failure handling
+        self._servicenow_breaker = CircuitBreaker()
+        self._storemaster_breaker = CircuitBreaker()
+        self._store_info_cache: Dict[str, Dict] = {}
+        
+    def reload_credentials(self):
+        """
+        Read credentials from the environment and rebuild auth headers.
+        Called once at startup; call again after rotating secrets.
+        """
         self.ssh_user = os.getenv("STORE_SSH_USER")
         self.ssh_key_path = os.getenv("STORE_SSH_KEY_PATH")
+        self.ssh_password = os.getenv("STORE_SSH_PASSWORD")
+        self.servicenow_token = os.getenv("SERVICENOW_TOKEN")
+        self.storemaster_token = os.getenv("STOREMASTER_TOKEN")
         
+        # Built once and passed by reference on every request
+        self._servicenow_headers = {
+            "Authorization": f"Bearer {self.servicenow_token}",
+            "Content-Type": "application/json"
+        }
+        self._storemaster_headers = {"Authorization": f"Bearer {self.storemaster_token}"}
+    
     async def execute(self, function_name: str, arguments: Dict) -> Dict:
         """
         Main entry point for executing system tools
@@ -57,16 +204,14 @@ class SystemTools:
         Check printer status via SSH connection
         """
         try:
+            lane = self._validate_lane(lane)
             connection = await self._get_ssh_connection(chain, store)
             
             # Execute printer status command
-            stdin, stdout, stderr = connection.exec_command(
-                f'cd /catalina && ./printer_status {lane}'
+            output, error = await self._run_ssh_command(
+                connection, f'cd /catalina && ./printer_status {lane}'
             )
             
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            
             if error:
                 logger.warning(f"Printer status error: {error}")
             
@@ -93,15 +238,14 @@ class SystemTools:
         Send test coupon to printer
         """
         try:
+            lane = self._validate_lane(lane)
             connection = await self._get_ssh_connection(chain, store)
             
             # Execute test print command
-            stdin, stdout, stderr = connection.exec_command(
-                f'cd /catalina && coup {lane}'
+            output, _ = await self._run_ssh_command(
+                connection, f'cd /catalina && coup {lane}'
             )
             
-            output = stdout.read().decode('utf-8')
-            
             return {
                 "success": "sent" in output.lower() or "success" in output.lower(),
                 "message": "Test coupon sent",
@@ -120,18 +264,16 @@ class SystemTools:
         Perform remote ink cleaning
         """
         try:
+            lane = self._validate_lane(lane)
             connection = await self._get_ssh_connection(chain, store)
             
             # Execute ink cleaning command
-            stdin, stdout, stderr = connection.exec_command(
-                f'cd /catalina && ink_clean {lane}'
+            output, _ = await self._run_ssh_command(
+                connection, f'cd /catalina && ink_clean {lane}'
             )
             
-            output = stdout.read().decode('utf-8')
-            
-            # Cleaning takes ~60 seconds
-            await asyncio.sleep(2)  # Wait a bit for command to initiate
-            
+            # The command has already been accepted by the store PC once its
+            # output is read; cleaning itself runs ~60 seconds on the printer
             return {
                 "success": True,
                 "message": "Ink cleaning initiated",
@@ -158,12 +300,18 @@ class SystemTools:
                     "error": "ServiceNow API not configured"
                 }
             
-            response = await self.http_client.patch(
+            if not self._servicenow_breaker.allow_request():
+                return {
+                    "success": False,
+                    "error": "ServiceNow temporarily unavailable",
+                    "ticket_id": ticket_id
+                }
+            
+            response = await self._request(
+                self._servicenow_breaker,
+                "PATCH",
                 f"{self.servicenow_api}/api/now/table/incident/{ticket_id}",
-                headers={
-                    "Authorization": f"Bearer {os.getenv('SERVICENOW_TOKEN')}",
-                    "Content-Type": "application/json"
-                },
+                headers=self._servicenow_headers,
                 json={
                     "state": self._map_status_to_servicenow(status),
                     "work_notes": resolution_notes,
@@ -171,8 +319,9 @@ class SystemTools:
                 }
             )
             
+            # ServiceNow PATCH may answer 200, 202 or 204
             return {
-                "success": response.status_code == 200,
+                "success": 200 <= response.status_code < 300,
                 "ticket_id": ticket_id
             }
             
@@ -195,14 +344,36 @@ class SystemTools:
                     "error": "StoreMaster API not configured"
                 }
             
-            response = await self.http_client.get(
+            cache_key = f"{chain}-{store}"
+            
+            if not self._storemaster_breaker.allow_request():
+                # Serve the last known store info rather than waiting on a dead backend
+                if cache_key in self._store_info_cache:
+                    return {
+                        "success": True,
+                        "data": self._store_info_cache[cache_key],
+                        "cached": True
+                    }
+                return {
+                    "success": False,
+                    "error": "StoreMaster temporarily unavailable"
+                }
+            
+            response = await self._request(
+                self._storemaster_breaker,
+                "GET",
                 f"{self.storemaster_api}/stores/{chain}/{store}",
-                headers={"Authorization": f"Bearer {os.getenv('STOREMASTER_TOKEN')}"}
+                headers=self._storemaster_headers
             )
             
+            success = 200 <= response.status_code < 300
+            data = json_loads(response.content) if success and response.content else None
+            if data:
+                self._store_info_cache[cache_key] = data
+            
             return {
-                "success": response.status_code == 200,
-                "data": response.json() if response.status_code == 200 else None
+                "success": success,
+                "data": data
             }
             
         except Exception as e:
@@ -212,48 +383,135 @@ class SystemTools:
                 "error": str(e)
             }
     
+    async def _request(self, breaker: CircuitBreaker, method: str, url: str,
+                       **kwargs) -> httpx.Response:
+        """
+        Send an HTTP request, retrying connection failures with exponential
+        backoff and recording every failed attempt on the backend's circuit breaker
+        """
+        delay = HTTP_RETRY_BASE_DELAY
+        for attempt in range(HTTP_RETRY_ATTEMPTS):
+            try:
+                response = await self.http_client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                # The request never reached the server, so resending it is safe
+                breaker.record_failure()
+                if attempt == HTTP_RETRY_ATTEMPTS - 1 or breaker.is_open:
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, HTTP_RETRY_MAX_DELAY)
+                continue
+            except httpx.TransportError:
+                # Read timeouts and protocol errors may arrive after the server
+                # applied the request (e.g. a PATCH appending work notes), so
+                # they are not retried
+                breaker.record_failure()
+                raise
+            
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
+    
     async def _get_ssh_connection(self, chain: int, store: int) -> paramiko.SSHClient:
         """
         Get or create SSH connection to store
         """
         connection_key = f"{chain}-{store}"
+        self._ssh_last_used[connection_key] = time.monotonic()
         
-        if connection_key in self.ssh_connections:
-            # Check if connection is still alive
-            try:
-                transport = self.ssh_connections[connection_key].get_transport()
-                if transport and transport.is_active():
-                    return self.ssh_connections[connection_key]
-            except:
-                pass
-        
-        # Create new connection
-        store_info = await self._get_store_info(chain, store)
+        if self._ssh_reaper is None:
+            self._ssh_reaper = asyncio.create_task(self._reap_ssh_connections())
         
-        if not store_info.get("success") or not store_info.get("data"):
-            raise ConnectionError(f"Could not retrieve store info for chain {chain}, store {store}")
-        
-        store_data = store_info["data"]
-        ip_address = store_data.get("ip_address") or f"store-{chain}-{store}.catalina.internal"
-        
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        if self.ssh_key_path:
-            client.connect(
-                hostname=ip_address,
-                username=self.ssh_user,
-                key_filename=self.ssh_key_path
-            )
-        else:
-            client.connect(
-                hostname=ip_address,
-                username=self.ssh_user,
-                password=os.getenv("STORE_SSH_PASSWORD")
-            )
-        
-        self.ssh_connections[connection_key] = client
-        return client
+        async with self._ssh_locks[connection_key]:
+            if connection_key in self.ssh_connections:
+                # Check if connection is still alive
+                try:
+                    transport = self.ssh_connections[connection_key].get_transport()
+                    if transport and transport.is_active():
+                        return self.ssh_connections[connection_key]
+                except:
+                    pass
+            
+            # Create new connection
+            store_info = await self._get_store_info(chain, store)
+            
+            if not store_info.get("success") or not store_info.get("data"):
+                raise ConnectionError(f"Could not retrieve store info for chain {chain}, store {store}")
+            
+            store_data = store_info["data"]
+            ip_address = store_data.get("ip_address") or f"store-{chain}-{store}.catalina.internal"
+            
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            
+            if self.ssh_key_path:
+                connect = partial(
+                    client.connect,
+                    hostname=ip_address,
+                    username=self.ssh_user,
+                    key_filename=self.ssh_key_path
+                )
+            else:
+                connect = partial(
+                    client.connect,
+                    hostname=ip_address,
+                    username=self.ssh_user,
+                    password=self.ssh_password
+                )
+            
+            # Handshake off the event loop
+            await asyncio.get_running_loop().run_in_executor(self._ssh_executor, connect)
+            
+            self.ssh_connections[connection_key] = client
+            return client
+    
+    async def _reap_ssh_connections(self):
+        """
+        Periodically close dead or idle SSH connections, keeping eviction
+        off the request path
+        """
+        while True:
+            await asyncio.sleep(SSH_REAPER_INTERVAL)
+            now = time.monotonic()
+            for connection_key, connection in list(self.ssh_connections.items()):
+                lock = self._ssh_locks.get(connection_key)
+                if lock is not None and lock.locked():
+                    continue  # being (re)connected right now
+                try:
+                    transport = connection.get_transport()
+                    alive = transport is not None and transport.is_active()
+                except Exception:
+                    alive = False
+                idle = now - self._ssh_last_used.get(connection_key, 0) > SSH_IDLE_TIMEOUT
+                if alive and not idle:
+                    continue
+                
+                logger.debug(f"Closing {'idle' if alive else 'dead'} SSH connection {connection_key}")
+                self.ssh_connections.pop(connection_key, None)
+                with contextlib.suppress(Exception):
+                    connection.close()
+            
+            # Drop per-store state for stores without a connection (closed above
+            # or never established) so it doesn't grow with every store seen.
+            # An unlocked lock has no holder or waiters, and nothing awaits
+            # between fetching a store's lock and acquiring it.
+            for connection_key, lock in list(self._ssh_locks.items()):
+                if connection_key not in self.ssh_connections and not lock.locked():
+                    del self._ssh_locks[connection_key]
+                    self._ssh_last_used.pop(connection_key, None)
+    
+    async def _run_ssh_command(self, connection: paramiko.SSHClient,
+                               command: str) -> Tuple[str, str]:
+        """
+        Run a command on a new channel of the store connection without
+        blocking the event loop. Returns (stdout, stderr).
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._ssh_executor, _exec_blocking, connection, command
+        )
     
     async def _get_store_info(self, chain: int, store: int) -> Dict:
         """
@@ -261,33 +519,37 @@ class SystemTools:
         """
         return await self.get_store_info(chain, store)
     
+    @staticmethod
+    def _validate_lane(lane) -> int:
+        """
+        Coerce a lane number to int before it is interpolated into a remote
+        shell command (tool arguments come straight from the LLM). Only ints
+        and numeric strings are accepted; floats and bools are rejected
+        rather than silently truncated.
+        """
+        if isinstance(lane, bool) or not isinstance(lane, (int, str)):
+            raise ValueError(f"Invalid lane number: {lane!r}")
+        try:
+            lane_number = int(lane)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid lane number: {lane!r}") from None
+        if lane_number < 0:
+            raise ValueError(f"Invalid lane number: {lane!r}")
+        return lane_number
+    
     def _parse_printer_status(self, output: str) -> Dict:
         """
         Parse printer status command output
         """
-        status_map = {
-            "Idle": "ready",
-            "ready": "ready",
-            "Busy": "busy",
-            "Off Line": "offline",
-            "offline": "offline",
-            "Error": "error",
-            "Paper Jam": "error",
-            "Out of Ink": "out_of_ink",
-            "Out of Paper": "out_of_paper"
-        }
-        
-        output_lower = output.lower()
-        
-        for key, value in status_map.items():
-            if key.lower() in output_lower:
-                return {
-                    "status": value,
-                    "details": output.strip()
-                }
+        # One case-insensitive pass over the raw output; when several keywords
+        # appear, the highest-priority one wins
+        ranked = [
+            PRINTER_STATUS_RANK[match.group(1).lower()]
+            for match in PRINTER_STATUS_PATTERN.finditer(output)
+        ]
         
         return {
-            "status": "unknown",
+            "status": min(ranked)[1] if ranked else "unknown",
             "details": output.strip()
         }
     
@@ -306,11 +568,14 @@ class SystemTools:
         """
         Close all connections
         """
+        if self._ssh_reaper is not None:
+            self._ssh_reaper.cancel()
+            self._ssh_reaper = None
+        
         for connection in self.ssh_connections.values():
-            try:
+            with contextlib.suppress(Exception):
                 connection.close()
-            except:
-                pass
         
+        self._ssh_executor.shutdown(wait=False)
         await self.http_client.aclose()
 
@@ -5,7 +5,6 @@ This script helps diagnose SIP connection issues.
 """
 
 import os
-import re
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=".env")
@@ -15,116 +14,122 @@ def get_sip_uri():
     """Get SIP URI from environment."""
     livekit_url = os.getenv("LIVEKIT_URL", "")
     if livekit_url:
-        match = re.search(r'wss://([^.]+)\.livekit\.cloud', livekit_url)
-        if match:
-            project_id = match.group(1)
-            return f"sip:{project_id}.sip.livekit.cloud"
+        if livekit_url.startswith("wss://"):
+            project_id, _, host = livekit_url[len("wss://"):].partition(".")
+            if project_id and host.startswith("livekit.cloud"):
+                return f"sip:{project_id}.sip.livekit.cloud"
     return None
 
 
 def main():
-    print("=" * 60)
-    print("SIP Connection Troubleshooting")
-    print("=" * 60)
-    print()
+    # Collect the report and write it in one go instead of line by line
+    lines = []
+    out = lines.append
+    
+    out("=" * 60)
+    out("SIP Connection Troubleshooting")
+    out("=" * 60)
+    out("")
     
     # Check environment
     livekit_url = os.getenv("LIVEKIT_URL")
     livekit_api_key = os.getenv("LIVEKIT_API_KEY")
     livekit_api_secret = os.getenv("LIVEKIT_API_SECRET")
     
-    print("1. Checking Environment Variables:")
+    out("1. Checking Environment Variables:")
     if livekit_url:
-        print(f"   ✅ LIVEKIT_URL: {livekit_url}")
+        out(f"   ✅ LIVEKIT_URL: {livekit_url}")
     else:
-        print("   ❌ LIVEKIT_URL: Not set")
+        out("   ❌ LIVEKIT_URL: Not set")
     
     if livekit_api_key:
-        print(f"   ✅ LIVEKIT_API_KEY: {'*' * 10}...{livekit_api_key[-4:]}")
+        out(f"   ✅ LIVEKIT_API_KEY: {'*' * 10}...{livekit_api_key[-4:]}")
     else:
-        print("   ❌ LIVEKIT_API_KEY: Not set")
+        out("   ❌ LIVEKIT_API_KEY: Not set")
     
     if livekit_api_secret:
-        print(f"   ✅ LIVEKIT_API_SECRET: {'*' * 10}...{livekit_api_secret[-4:]}")
+        out(f"   ✅ LIVEKIT_API_SECRET: {'*' * 10}...{livekit_api_secret[-4:]}")
     else:
-        print("   ❌ LIVEKIT_API_SECRET: Not set")
+        out("   ❌ LIVEKIT_API_SECRET: Not set")
     
-    print()
+    out("")
     
     # Get SIP URI
     sip_uri = get_sip_uri()
-    print("2. SIP URI Configuration:")
+    out("2. SIP URI Configuration:")
     if sip_uri:
-        print(f"   ✅ SIP URI: {sip_uri}")
+        out(f"   ✅ SIP URI: {sip_uri}")
     else:
-        print("   ❌ Could not determine SIP URI from LIVEKIT_URL")
-        print("   Please check your .env file")
+        out("   ❌ Could not determine SIP URI from LIVEKIT_URL")
+        out("   Please check your .env file")
     
-    print()
-    print("3. VoIP Client Configuration:")
-    print("   Make sure your VoIP client is configured with:")
+    out("")
+    out("3. VoIP Client Configuration:")
+    out("   Make sure your VoIP client is configured with:")
     if sip_uri:
-        print(f"   - SIP URI/Username: {sip_uri}")
-    print("   - Server/Proxy: sip.livekit.cloud")
-    print("   - Port: 5060")
-    print("   - Transport: UDP or TCP")
-    print("   - Password: (leave empty)")
+        out(f"   - SIP URI/Username: {sip_uri}")
+    out("   - Server/Proxy: sip.livekit.cloud")
+    out("   - Port: 5060")
+    out("   - Transport: UDP or TCP")
+    out("   - Password: (leave empty)")
     
-    print()
-    print("4. IMPORTANT - How to Dial:")
-    print("   ⚠️  You cannot just dial '5' or any number!")
-    print("   You need to dial the FULL SIP URI:")
+    out("")
+    out("4. IMPORTANT - How to Dial:")
+    out("   ⚠️  You cannot just dial '5' or any number!")
+    out("   You need to dial the FULL SIP URI:")
     if sip_uri:
-        print(f"   📞 Dial: {sip_uri}")
+        out(f"   📞 Dial: {sip_uri}")
     else:
-        print("   📞 Dial: sip:your-project-id.sip.livekit.cloud")
-    print()
-    print("   Some VoIP clients require different formats:")
-    print("   - Try dialing: sip:your-project-id.sip.livekit.cloud")
-    print("   - Or try: your-project-id.sip.livekit.cloud")
-    print("   - Or check your client's 'Call' or 'Dial' option")
+        out("   📞 Dial: sip:your-project-id.sip.livekit.cloud")
+    out("")
+    out("   Some VoIP clients require different formats:")
+    out("   - Try dialing: sip:your-project-id.sip.livekit.cloud")
+    out("   - Or try: your-project-id.sip.livekit.cloud")
+    out("   - Or check your client's 'Call' or 'Dial' option")
     
-    print()
-    print("5. Agent Status:")
-    print("   Make sure your agent is running:")
-    print("   python assistant.py start")
-    print()
-    print("   You should see logs like:")
-    print("   - 'registered worker'")
-    print("   - 'initializing process'")
-    print("   - When a call connects: 'Connected to phone number'")
+    out("")
+    out("5. Agent Status:")
+    out("   Make sure your agent is running:")
+    out("   python assistant.py start")
+    out("")
+    out("   You should see logs like:")
+    out("   - 'registered worker'")
+    out("   - 'initializing process'")
+    out("   - When a call connects: 'Connected to phone number'")
     
-    print()
-    print("6. Common Issues:")
-    print("   ❌ Dialing just a number (like '5') won't work")
-    print("   ✅ You must dial the full SIP URI")
-    print()
-    print("   ❌ Wrong server address")
-    print("   ✅ Use: sip.livekit.cloud")
-    print()
-    print("   ❌ Agent not running")
-    print("   ✅ Start with: python assistant.py start")
-    print()
-    print("   ❌ Firewall blocking SIP (port 5060)")
-    print("   ✅ Check firewall settings")
+    out("")
+    out("6. Common Issues:")
+    out("   ❌ Dialing just a number (like '5') won't work")
+    out("   ✅ You must dial the full SIP URI")
+    out("")
+    out("   ❌ Wrong server address")
+    out("   ✅ Use: sip.livekit.cloud")
+    out("")
+    out("   ❌ Agent not running")
+    out("   ✅ Start with: python assistant.py start")
+    out("")
+    out("   ❌ Firewall blocking SIP (port 5060)")
+    out("   ✅ Check firewall settings")
     
-    print()
-    print("=" * 60)
-    print("Next Steps:")
-    print("=" * 60)
-    print()
+    out("")
+    out("=" * 60)
+    out("Next Steps:")
+    out("=" * 60)
+    out("")
     if sip_uri:
-        print(f"1. Configure your VoIP client with SIP URI: {sip_uri}")
-        print("2. In your VoIP client, dial the FULL SIP URI:")
-        print(f"   {sip_uri}")
-        print("3. Make sure your agent is running")
-        print("4. The call should connect automatically")
+        out(f"1. Configure your VoIP client with SIP URI: {sip_uri}")
+        out("2. In your VoIP client, dial the FULL SIP URI:")
+        out(f"   {sip_uri}")
+        out("3. Make sure your agent is running")
+        out("4. The call should connect automatically")
     else:
-        print("1. Check your .env file has LIVEKIT_URL set correctly")
-        print("2. Get your SIP URI from LiveKit Cloud dashboard")
-        print("3. Configure your VoIP client")
-        print("4. Dial the full SIP URI (not just a number)")
-    print()
+        out("1. Check your .env file has LIVEKIT_URL set correctly")
+        out("2. Get your SIP URI from LiveKit Cloud dashboard")
+        out("3. Configure your VoIP client")
+        out("4. Dial the full SIP URI (not just a number)")
+    out("")
+    
+    print("\n".join(lines))
 
 
 if __name__ == "__main__":
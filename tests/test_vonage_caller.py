@@ -0,0 +1,110 @@
+import pytest
+
+import vonage_caller
+from vonage_caller import (
+    CALL_RETRY_ATTEMPTS,
+    CALL_RETRY_MAX_DELAY,
+    _call_with_retries,
+    _record_response,
+    _retry_delay,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ClientError(Exception):
+    """Stands in for vonage 3.x ClientError: a message, no response attached."""
+
+
+class HttpRequestError(Exception):
+    """Stands in for newer SDK errors, which carry the response."""
+
+    def __init__(self, response: FakeResponse) -> None:
+        super().__init__(f"{response.status_code} error")
+        self.response = response
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    recorded: list[float] = []
+    monkeypatch.setattr(vonage_caller.time, "sleep", recorded.append)
+    return recorded
+
+
+def failing_call(responses: list[FakeResponse], result: str = "ok"):
+    """A fake API call that fails once per response (as the 3.x SDK does), then succeeds."""
+    remaining = list(responses)
+
+    def call(*args):
+        if remaining:
+            # The session hook sees the response before the SDK raises
+            _record_response(remaining.pop(0))
+            raise ClientError("Throttled: Rate limit hit (https://developer.vonage.com/api-errors#throttled)")
+        return result
+
+    return call
+
+
+def test_retries_rate_limited_call_using_recorded_status(sleeps: list[float]) -> None:
+    """A 429 is retried even though the 3.x error message has no status code."""
+    call = failing_call([FakeResponse(429, {"Retry-After": "2"}), FakeResponse(503)])
+
+    assert _call_with_retries(call) == "ok"
+    assert len(sleeps) == 2
+    assert sleeps[0] == 2.0
+
+
+def test_retries_status_from_error_response(sleeps: list[float]) -> None:
+    """Errors that carry their response are retried by its status code."""
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise HttpRequestError(FakeResponse(503, {"Retry-After": "1"}))
+        return "ok"
+
+    assert _call_with_retries(call) == "ok"
+    assert sleeps == [1.0]
+
+
+def test_does_not_retry_other_client_errors(sleeps: list[float]) -> None:
+    """A 400 is raised straight away."""
+    call = failing_call([FakeResponse(400)])
+
+    with pytest.raises(ClientError):
+        _call_with_retries(call)
+    assert sleeps == []
+
+
+def test_does_not_retry_errors_without_a_response(sleeps: list[float]) -> None:
+    """A failure before any response (e.g. a bad argument) is not retried."""
+
+    def call():
+        raise ValueError("bad request object")
+
+    with pytest.raises(ValueError):
+        _call_with_retries(call)
+    assert sleeps == []
+
+
+def test_gives_up_after_retry_attempts(sleeps: list[float]) -> None:
+    """The last failure is raised once every attempt is used."""
+    call = failing_call([FakeResponse(429)] * CALL_RETRY_ATTEMPTS)
+
+    with pytest.raises(ClientError):
+        _call_with_retries(call)
+    assert len(sleeps) == CALL_RETRY_ATTEMPTS - 1
+
+
+def test_retry_delay_backs_off_with_jitter_and_cap() -> None:
+    """Without Retry-After the delay doubles per attempt, plus up to 1s jitter, capped."""
+    for attempt in range(4):
+        delay = _retry_delay(FakeResponse(429), attempt)
+        assert 2 ** attempt <= delay <= 2 ** attempt + 1
+    assert _retry_delay(None, 10) == CALL_RETRY_MAX_DELAY
+    assert _retry_delay(FakeResponse(429, {"Retry-After": "600"}), 0) == CALL_RETRY_MAX_DELAY
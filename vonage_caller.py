@@ -5,9 +5,16 @@ This module provides functionality to make outbound phone calls using the Vonage
 It handles call creation, webhook URLs, and call management.
 """
 
+import asyncio
 import os
 import logging
-from typing import Optional, Dict, Any
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -34,8 +41,29 @@ except ImportError:
 # Configuration
 # ============================================================================
 
+# Maximum number of calls make_calls() places at the same time
+MAX_CONCURRENT_CALLS = 10
+
+# Retry policy for rate-limited / unavailable Vonage API responses
+CALL_RETRY_ATTEMPTS = 6
+CALL_RETRY_MAX_DELAY = 60.0
+RETRYABLE_STATUS_CODES = (429, 503)
+
+# Log prefixes for the call path; messages use lazy %s formatting
+CALL_EMOJI = "📞"
+SUCCESS_EMOJI = "✅"
+FAILURE_EMOJI = "❌"
+WARNING_EMOJI = "⚠️"
+
+# E.164 phone number: "+", country code, subscriber number, 8-15 digits total
+E164_PATTERN = re.compile(r'\+[1-9]\d{7,14}')
+
+
 class VonageSettings:
-    """Vonage API configuration settings."""
+    """
+    Vonage API configuration settings, read from the environment once at
+    import; restart to pick up changes. Use the class directly.
+    """
     
     # API Credentials
     VONAGE_API_KEY: str = os.getenv("VONAGE_API_KEY", "")
@@ -51,35 +79,85 @@ class VonageSettings:
     
     # Optional: Status callback URL
     STATUS_URL: Optional[str] = os.getenv("VONAGE_STATUS_URL", None)
+    
+    @classmethod
+    def build_template(cls) -> Tuple[Dict[str, str], List[str], List[str], Optional[str]]:
+        """
+        Build the parts of a call request that don't depend on the destination.
+        
+        Returns:
+            Tuple of (from_, answer_url, event_url, status_url) values for CreateCallRequest
+        """
+        if not cls.VONAGE_PHONE_NUMBER:
+            raise ValueError("from_number is required (set VONAGE_PHONE_NUMBER in .env)")
+        if not cls.ANSWER_URL:
+            raise ValueError("answer_url is required (set VONAGE_ANSWER_URL in .env)")
+        if not cls.EVENT_URL:
+            raise ValueError("event_url is required (set VONAGE_EVENT_URL in .env)")
+        
+        return (
+            {"type": "phone", "number": cls.VONAGE_PHONE_NUMBER},
+            [cls.ANSWER_URL],
+            [cls.EVENT_URL],
+            cls.STATUS_URL,
+        )
 
 
 # ============================================================================
 # Vonage Client Initialization
 # ============================================================================
 
+# Shared client (and its HTTP connection pool), created on first use
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
 def get_vonage_client() -> Optional[Client]:
     """
-    Initialize and return a Vonage client instance.
+    Return the shared Vonage client, initializing it on first use.
     
     Returns:
         Vonage Client instance if credentials are available, None otherwise
     """
+    global _client
+    
+    if _client is not None:
+        return _client
+    
+    with _client_lock:
+        if _client is None:
+            _client = _create_vonage_client()
+        return _client
+
+
+def _create_vonage_client() -> Optional[Client]:
+    """Initialize a Vonage client instance, or None if unavailable"""
     if not VONAGE_AVAILABLE:
         logger.error("Vonage SDK is not installed")
         return None
     
-    settings = VonageSettings()
+    settings = VonageSettings
     
     if not settings.VONAGE_API_KEY or not settings.VONAGE_API_SECRET:
         logger.error("Vonage API credentials not configured. Set VONAGE_API_KEY and VONAGE_API_SECRET in .env")
         return None
     
     try:
-        client = Client(key=settings.VONAGE_API_KEY, secret=settings.VONAGE_API_SECRET)
+        # Keep enough keep-alive connections for concurrent make_calls() requests
+        client = Client(
+            key=settings.VONAGE_API_KEY,
+            secret=settings.VONAGE_API_SECRET,
+            pool_maxsize=MAX_CONCURRENT_CALLS,
+        )
+        # Remember each response so failed calls can be retried by status code
+        session = getattr(client, "session", None)
+        if session is not None:
+            session.hooks["response"].append(_record_response)
+        
         logger.info("✅ Vonage client initialized successfully")
         return client
     except Exception as e:
-        logger.error(f"Failed to initialize Vonage client: {e}")
+        logger.error("Failed to initialize Vonage client: %s", e)
         return None
 
 
@@ -117,7 +195,7 @@ def create_call_request(
         ... )
         >>> response = client.voice.create_call(request)
     """
-    settings = VonageSettings()
+    settings = VonageSettings
     
     # Use provided values or fall back to settings
     from_number = from_number or settings.VONAGE_PHONE_NUMBER
@@ -127,6 +205,8 @@ def create_call_request(
     # Validate required fields
     if not to_number:
         raise ValueError("to_number is required")
+    if not E164_PATTERN.fullmatch(to_number):
+        raise ValueError(f"to_number must be in E.164 format (e.g. +1234567890), got {to_number!r}")
     if not from_number:
         raise ValueError("from_number is required (set VONAGE_PHONE_NUMBER in .env)")
     if not answer_url:
@@ -147,10 +227,49 @@ def create_call_request(
     if status_url or settings.STATUS_URL:
         call_request.status_url = status_url or settings.STATUS_URL
     
-    logger.info(f"📞 Call request created: {from_number} -> {to_number}")
-    logger.debug(f"   Answer URL: {answer_url}")
-    logger.debug(f"   Event URL: {event_url}")
+    logger.info("%s Call request created: %s -> %s", CALL_EMOJI, from_number, to_number)
+    logger.debug("   Answer URL: %s", answer_url)
+    logger.debug("   Event URL: %s", event_url)
+    
+    return call_request
+
+
+@lru_cache(maxsize=None)
+def _get_call_template() -> Tuple[Dict[str, str], List[str], List[str], Optional[str]]:
+    """Call request template from the settings, built once (restart to pick up .env changes)"""
+    return VonageSettings.build_template()
+
+
+def create_call_request_fast(to_number: str) -> CreateCallRequest:
+    """
+    Create a call request using only the configured defaults.
+    
+    Same as create_call_request(to_number) but reuses a prebuilt template, so
+    repeated calls (e.g. a dialing campaign) only fill in the destination.
+    The template objects are shared between requests and must not be modified.
+    
+    Args:
+        to_number: The phone number to call (E.164 format, e.g., "+1234567890")
+    
+    Returns:
+        CreateCallRequest object configured for making the call
+    """
+    if not to_number:
+        raise ValueError("to_number is required")
+    if not E164_PATTERN.fullmatch(to_number):
+        raise ValueError(f"to_number must be in E.164 format (e.g. +1234567890), got {to_number!r}")
+    
+    from_, answer_url, event_url, status_url = _get_call_template()
+    call_request = CreateCallRequest(
+        to=[{"type": "phone", "number": to_number}],
+        from_=from_,
+        answer_url=answer_url,
+        event_url=event_url,
+    )
+    if status_url:
+        call_request.status_url = status_url
     
+    logger.info("%s Call request created: %s -> %s", CALL_EMOJI, from_['number'], to_number)
     return call_request
 
 
@@ -158,6 +277,54 @@ def create_call_request(
 # Call Management Functions
 # ============================================================================
 
+# Last HTTP response the Vonage client received on this thread. The 3.x SDK
+# raises ClientError / ServerError without the response, and rewrites the
+# message from the error body, so the status is taken from here instead
+_last_response = threading.local()
+
+
+def _record_response(response, *args, **kwargs):
+    """requests response hook registered on the Vonage client's session"""
+    _last_response.value = response
+
+
+def _error_response(error: Exception) -> Any:
+    """HTTP response behind a failed Vonage API call, if known"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        return response
+    return getattr(_last_response, "value", None)
+
+
+def _retry_delay(response: Any, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After, else backoff with jitter"""
+    retry_after = getattr(response, "headers", {}).get("Retry-After")
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = 2 ** attempt + random.uniform(0, 1)
+    return min(CALL_RETRY_MAX_DELAY, delay)
+
+
+def _call_with_retries(func: Callable[..., Any], *args) -> Any:
+    """Call a Vonage API function, retrying 429 / 503 responses with backoff"""
+    for attempt in range(CALL_RETRY_ATTEMPTS):
+        _last_response.value = None
+        try:
+            return func(*args)
+        except Exception as e:
+            response = _error_response(e)
+            status_code = getattr(response, "status_code", None)
+            if status_code not in RETRYABLE_STATUS_CODES or attempt == CALL_RETRY_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(response, attempt)
+            logger.warning(
+                "%s Vonage returned %s, retrying in %.1fs (attempt %d/%d)",
+                WARNING_EMOJI, status_code, delay, attempt + 1, CALL_RETRY_ATTEMPTS
+            )
+            time.sleep(delay)
+
+
 def make_call(
     to_number: str,
     from_number: Optional[str] = None,
@@ -211,8 +378,8 @@ def make_call(
         )
         
         # Make the call
-        logger.info(f"📞 Initiating call to {to_number}...")
-        response = client.voice.create_call(call_request)
+        logger.info("%s Initiating call to %s...", CALL_EMOJI, to_number)
+        response = _call_with_retries(client.voice.create_call, call_request)
         
         # Parse response
         result = {
@@ -224,18 +391,113 @@ def make_call(
             "response": response
         }
         
-        logger.info(f"✅ Call initiated successfully. UUID: {result['call_uuid']}")
+        logger.info("%s Call initiated successfully. UUID: %s", SUCCESS_EMOJI, result['call_uuid'])
         return result
         
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"❌ Failed to make call: {error_msg}")
+        logger.error("%s Failed to make call: %s", FAILURE_EMOJI, error_msg)
         return {
             "success": False,
             "error": error_msg
         }
 
 
+def make_calls(
+    to_numbers: List[str],
+    from_number: Optional[str] = None,
+    answer_url: Optional[str] = None,
+    event_url: Optional[str] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Make outbound phone calls to several numbers concurrently.
+    
+    The Vonage Voice API creates one call per request, so the requests are
+    issued in parallel (up to MAX_CONCURRENT_CALLS at a time) instead of
+    one after another.
+    
+    Args:
+        to_numbers: The phone numbers to call (E.164 format)
+        from_number: The phone number to call from (optional)
+        answer_url: URL for call answer webhook (optional)
+        event_url: URL for call event webhook (optional)
+        **kwargs: Additional parameters for CreateCallRequest
+    
+    Returns:
+        Dictionary with totals and the make_call() result for each number, in order
+    
+    Example:
+        >>> result = make_calls(["+1234567890", "+1987654321"])
+        >>> print(f"{result['succeeded']}/{result['total']} calls initiated")
+    """
+    if not to_numbers:
+        return {"success": True, "total": 0, "succeeded": 0, "results": []}
+    
+    def call(to_number: str) -> Dict[str, Any]:
+        return make_call(
+            to_number=to_number,
+            from_number=from_number,
+            answer_url=answer_url,
+            event_url=event_url,
+            **kwargs
+        )
+    
+    workers = min(MAX_CONCURRENT_CALLS, len(to_numbers))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vonage-call") as executor:
+        results = list(executor.map(call, to_numbers))
+    
+    succeeded = sum(1 for result in results if result.get("success"))
+    logger.info("%s Batch complete: %d/%d calls initiated", CALL_EMOJI, succeeded, len(results))
+    return {
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "results": results
+    }
+
+
+async def make_calls_async(
+    to_numbers: List[str],
+    from_number: Optional[str] = None,
+    answer_url: Optional[str] = None,
+    event_url: Optional[str] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Async version of make_calls() for callers already running an event loop.
+    
+    Calls are gathered on the loop with at most MAX_CONCURRENT_CALLS in flight;
+    each runs the synchronous SDK request in a worker thread, sharing the
+    client's connection pool.
+    
+    Returns:
+        Same dictionary as make_calls()
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    
+    async def call(to_number: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(
+                make_call,
+                to_number=to_number,
+                from_number=from_number,
+                answer_url=answer_url,
+                event_url=event_url,
+                **kwargs
+            )
+    
+    results = list(await asyncio.gather(*(call(to_number) for to_number in to_numbers)))
+    succeeded = sum(1 for result in results if result.get("success"))
+    logger.info("%s Batch complete: %d/%d calls initiated", CALL_EMOJI, succeeded, len(results))
+    return {
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "results": results
+    }
+
+
 def get_call_status(call_uuid: str) -> Dict[str, Any]:
     """
     Get the status of a call by its UUID.
@@ -260,7 +522,7 @@ def get_call_status(call_uuid: str) -> Dict[str, Any]:
         }
     
     try:
-        response = client.voice.get_call(call_uuid)
+        response = _call_with_retries(client.voice.get_call, call_uuid)
         return {
             "success": True,
             "status": response.get("status"),
@@ -314,4 +576,9 @@ if __name__ == "__main__":
         print(f"\nExample 3: Checking call status for {result['call_uuid']}")
         status = get_call_status(result["call_uuid"])
         print(f"Status: {status}")
+    
+    # Example 4: Call several numbers at once
+    print("\nExample 4: Calling several numbers concurrently")
+    batch = make_calls(["+1234567890", "+1987654321"])  # Replace with actual numbers
+    print(f"Initiated {batch['succeeded']}/{batch['total']} calls")
 
@@ -3,14 +3,26 @@ Web server for managing the LiveKit agent
 Provides a simple web interface to start/stop the agent
 """
 
+import json
 import os
+import queue
+import selectors
 import subprocess
 import signal
+import sys
 import logging
-from flask import Flask, send_from_directory, jsonify, request
+from flask import Flask, Response, send_from_directory, jsonify, request
 from flask_cors import CORS
 import threading
 import time
+from collections import deque
+
+try:
+    import orjson
+    json_dumps = orjson.dumps
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
 
 app = Flask(__name__, static_folder='.')
 CORS(app)
@@ -18,60 +30,83 @@ CORS(app)
 logger = logging.getLogger("web-server")
 logger.setLevel(logging.INFO)
 
+# Python executable for the agent (prefer venv if available), resolved once
+PYTHON_EXE = next(
+    (path for path in (".venv/bin/python", "venv/bin/python") if os.path.exists(path)),
+    sys.executable
+)
+
+# Environment passed to the agent, snapshotted once at startup
+AGENT_ENV = os.environ.copy()
+
+# Size of each read from the agent's stdout pipe
+LOG_READ_SIZE = 65536
+
 # Global process management
 agent_process = None
-agent_thread = None
 agent_status = {
     "running": False,
     "pid": None,
     "start_time": None,
-    "logs": []
+    "logs": deque(maxlen=100)  # Keep only last 100 logs
 }
+# Guards agent_status["logs"] and log_subscribers, shared by the agent reader
+# thread and request handlers
+logs_lock = threading.Lock()
+# One queue per connected /api/events client; new log entries are pushed to each
+log_subscribers = []
+# Id of the most recent log entry, sent as the SSE event id so a reconnecting
+# browser can resume from Last-Event-ID
+log_sequence = 0
+# Seconds between keep-alive comments on an idle event stream
+EVENT_KEEPALIVE_INTERVAL = 15
+
+# Agent stdout pipes are watched by one shared reader thread (started on first
+# use) instead of a dedicated thread per agent start
+output_selector = selectors.DefaultSelector()
+output_reader = None
+output_reader_lock = threading.Lock()
+# Agents whose output has ended but that haven't exited yet; the reader polls
+# them instead of blocking in wait()
+exiting_agents = []
+# Seconds between those polls
+EXIT_POLL_INTERVAL = 0.5
+# Seconds start_agent waits before checking the agent didn't crash on startup
+AGENT_STARTUP_CHECK_DELAY = 1
+
+# Last formatted uptime, reused while the whole-second value is unchanged
+uptime_cache = (None, None)
 
 
 def run_agent():
-    """Run the agent in a separate thread"""
+    """Start the agent process; its output is logged by the shared reader thread"""
     global agent_process, agent_status
     
     try:
         logger.info("Starting agent process...")
         agent_status["running"] = True
-        agent_status["start_time"] = time.time()
-        
-        # Determine Python executable (prefer venv if available)
-        python_exe = "python"
-        if os.path.exists(".venv/bin/python"):
-            python_exe = ".venv/bin/python"
-        elif os.path.exists("venv/bin/python"):
-            python_exe = "venv/bin/python"
+        agent_status["start_time"] = time.monotonic()
         
         # Start the agent process in console mode for testing
         # Pass environment variables to ensure .env is loaded
-        env = os.environ.copy()
         agent_process = subprocess.Popen(
-            [python_exe, "assistant.py", "console"],
+            [PYTHON_EXE, "assistant.py", "console"],
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-            env=env,
+            bufsize=0,
+            env=AGENT_ENV,
             cwd=os.getcwd()
         )
         
         agent_status["pid"] = agent_process.pid
         add_log("Agent process started (PID: {})".format(agent_process.pid), "success")
         
-        # Read output line by line
-        for line in iter(agent_process.stdout.readline, ''):
-            if line:
-                add_log(line.strip(), "info")
-        
-        # Process ended
-        agent_process.wait()
-        agent_status["running"] = False
-        agent_status["pid"] = None
-        add_log("Agent process ended", "info")
+        ensure_output_reader()
+        output_selector.register(
+            agent_process.stdout,
+            selectors.EVENT_READ,
+            {"process": agent_process, "pending": b""}
+        )
         
     except Exception as e:
         logger.error(f"Error running agent: {e}")
@@ -80,60 +115,204 @@ def run_agent():
         add_log(f"Error: {str(e)}", "error")
 
 
+def ensure_output_reader():
+    """Start the shared agent output reader thread if it isn't running"""
+    global output_reader
+    
+    with output_reader_lock:
+        if output_reader is None:
+            output_reader = threading.Thread(target=read_agent_output, daemon=True)
+            output_reader.start()
+
+
+def read_agent_output():
+    """Log output from every registered agent pipe as it becomes readable"""
+    global output_reader
+    
+    # Blocks until a pipe is readable; epoll/kqueue also watch pipes registered
+    # from another thread while select() is waiting
+    try:
+        while True:
+            timeout = EXIT_POLL_INTERVAL if exiting_agents else None
+            for key, _ in output_selector.select(timeout):
+                try:
+                    read_agent_chunk(key)
+                except Exception as e:
+                    logger.error(f"Error reading agent output: {e}")
+                    add_log(f"Error reading agent output: {e}", "error")
+                    abandon_agent_output(key)
+            for process in [p for p in exiting_agents if p.poll() is not None]:
+                exiting_agents.remove(process)
+                agent_exited(process)
+    finally:
+        # Let the next agent start restart the reader if this thread dies
+        with output_reader_lock:
+            output_reader = None
+
+
+def abandon_agent_output(key):
+    """Kill an agent whose output can no longer be read and clean up its pipe"""
+    try:
+        process = key.data["process"]
+        if process.poll() is None:
+            process.kill()
+        finish_agent_output(key)
+    except Exception as e:
+        # The shared reader must survive a failed cleanup of one agent
+        logger.error(f"Error cleaning up agent output: {e}")
+        if key.fileobj in output_selector.get_map():
+            output_selector.unregister(key.fileobj)
+
+
+def read_agent_chunk(key):
+    """Read one chunk from a ready agent pipe and log every complete line in it"""
+    state = key.data
+    chunk = os.read(key.fd, LOG_READ_SIZE)
+    if chunk:
+        lines = (state["pending"] + chunk).split(b"\n")
+        state["pending"] = lines.pop()
+        add_logs([line.decode(errors="replace").strip() for line in lines], "info")
+        return
+    
+    # EOF: the process ended
+    finish_agent_output(key)
+
+
+def finish_agent_output(key):
+    """Stop watching an agent pipe; the agent is marked stopped once it exits"""
+    state = key.data
+    if key.fileobj in output_selector.get_map():
+        output_selector.unregister(key.fileobj)
+    key.fileobj.close()
+    if state["pending"]:
+        add_log(state["pending"].decode(errors="replace").strip(), "info")
+        state["pending"] = b""
+    
+    process = state["process"]
+    if process.poll() is None:
+        # Output closed but the process is still running; reap it later
+        exiting_agents.append(process)
+    else:
+        agent_exited(process)
+
+
+def agent_exited(process):
+    """Mark the agent stopped after its (already reaped) process has exited"""
+    if agent_process is process:
+        agent_status["running"] = False
+        agent_status["pid"] = None
+    add_log("Agent process ended", "info")
+
+
 def add_log(message, level="info"):
     """Add a log entry"""
-    log_entry = {
-        "time": time.strftime("%H:%M:%S"),
-        "message": message,
-        "level": level
-    }
-    agent_status["logs"].append(log_entry)
-    # Keep only last 100 logs
-    if len(agent_status["logs"]) > 100:
-        agent_status["logs"] = agent_status["logs"][-100:]
+    add_logs([message], level)
+
+
+def add_logs(messages, level="info"):
+    """Add several log entries at once"""
+    global log_sequence
+    timestamp = time.strftime("%H:%M:%S")
+    with logs_lock:
+        entries = [
+            {"id": log_sequence + offset, "time": timestamp, "message": message, "level": level}
+            for offset, message in enumerate(messages, 1)
+        ]
+        log_sequence += len(entries)
+        agent_status["logs"].extend(entries)
+        for subscriber in log_subscribers:
+            subscriber.put(entries)
 
 
 @app.route('/')
 def index():
     """Serve the HTML interface"""
-    return send_from_directory('.', 'index.html')
+    # Let browsers reuse the page for a minute, then revalidate (ETag / Last-Modified)
+    return send_from_directory('.', 'index.html', max_age=60)
 
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get agent status"""
+    global uptime_cache
     uptime = None
-    if agent_status["running"] and agent_status["start_time"]:
-        uptime_seconds = int(time.time() - agent_status["start_time"])
-        minutes = uptime_seconds // 60
-        seconds = uptime_seconds % 60
-        uptime = f"{minutes}m {seconds}s"
+    start_time = agent_status["start_time"]
+    if agent_status["running"] and start_time is not None:
+        uptime_seconds = int(time.monotonic() - start_time)
+        cached_seconds, uptime = uptime_cache
+        if uptime_seconds != cached_seconds:
+            minutes, seconds = divmod(uptime_seconds, 60)
+            uptime = f"{minutes}m {seconds}s"
+            uptime_cache = (uptime_seconds, uptime)
+    
+    with logs_lock:
+        logs = list(agent_status["logs"])[-20:]  # Last 20 logs
     
-    return jsonify({
+    payload = {
         "running": agent_status["running"],
         "pid": agent_status["pid"],
         "uptime": uptime,
-        "logs": agent_status["logs"][-20:]  # Last 20 logs
-    })
+        "logs": logs
+    }
+    return app.response_class(json_dumps(payload), mimetype='application/json')
+
+
+@app.route('/api/events', methods=['GET'])
+def log_events():
+    """
+    Stream log entries to the browser as server-sent events. A new connection
+    first gets the buffered logs; a reconnect (Last-Event-ID) gets only the
+    entries it missed.
+    """
+    try:
+        last_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_id = 0
+    
+    subscriber = queue.Queue()
+    with logs_lock:
+        # An id ahead of ours means the server restarted; resend everything
+        if last_id > log_sequence:
+            last_id = 0
+        backlog = [entry for entry in agent_status["logs"] if entry["id"] > last_id]
+        log_subscribers.append(subscriber)
+    
+    def format_events(entries):
+        return "".join(f"id: {entry['id']}\ndata: {json.dumps(entry)}\n\n" for entry in entries)
+    
+    def stream():
+        try:
+            if backlog:
+                yield format_events(backlog)
+            while True:
+                try:
+                    entries = subscriber.get(timeout=EVENT_KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_events(entries)
+        finally:
+            with logs_lock:
+                log_subscribers.remove(subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
 
 
 @app.route('/api/start', methods=['POST'])
 def start_agent():
     """Start the agent"""
-    global agent_thread, agent_process
-    
     if agent_status["running"]:
         return jsonify({"success": False, "error": "Agent is already running"})
     
     try:
-        # Start agent in a separate thread
-        agent_thread = threading.Thread(target=run_agent, daemon=True)
-        agent_thread.start()
+        # Spawning is quick; output is picked up by the shared reader thread
+        run_agent()
         
-        # Wait a moment to check if it started successfully
-        time.sleep(1)
+        # Wait a moment to catch an agent that crashes right after spawning
+        time.sleep(AGENT_STARTUP_CHECK_DELAY)
+        process = agent_process
         
-        if agent_status["running"]:
+        if agent_status["running"] and process is not None and process.poll() is None:
             return jsonify({"success": True, "message": "Agent started successfully"})
         else:
             return jsonify({"success": False, "error": "Failed to start agent"})
@@ -146,7 +325,7 @@ def start_agent():
 @app.route('/api/stop', methods=['POST'])
 def stop_agent():
     """Stop the agent"""
-    global agent_process, agent_thread
+    global agent_process
     
     if not agent_status["running"]:
         return jsonify({"success": False, "error": "Agent is not running"})
@@ -180,37 +359,20 @@ def stop_agent():
 if __name__ == '__main__':
     import socket
     
-    def find_free_port(start_port=5001, max_attempts=10):
-        """Find a free port starting from start_port"""
-        for port in range(start_port, start_port + max_attempts):
+    PREFERRED_PORT = 5500
+    
+    def pick_port(preferred):
+        """Use the preferred port if it is free, else let the kernel pick one"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('', port))
-                    return port
+                s.bind(('', preferred))
             except OSError:
-                continue
-        return None
-    
-    # Try to use port 5500, fallback to 5001 or find available port
-    port = None
-    preferred_ports = [5500, 5001, 5002, 5003, 5004, 5005]
+                s.bind(('', 0))
+            return s.getsockname()[1]
     
-    for test_port in preferred_ports:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind(('', test_port))
-                port = test_port
-                break
-        except OSError:
-            continue
-    
-    # If preferred ports are all in use, find any free port
-    if port is None:
-        port = find_free_port(5001)
-        if port is None:
-            print("❌ Error: Could not find an available port")
-            exit(1)
+    # Try to use port 5500 (the page's default), fallback to any free port
+    port = pick_port(PREFERRED_PORT)
     
     print("\n" + "="*60)
     print("🚀 Catalina Marketing Printer Support Agent - Web Interface")